@@ -0,0 +1,34 @@
+"""
+Dashboard subcommand for the Nova CLI
+Kept in its own module so Flask is only imported when the dashboard starts
+"""
+
+from . import _markers
+
+def add_arguments(subparser):
+    """Add the dashboard command's arguments to its subparser"""
+    subparser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
+    subparser.add_argument('--port', type=int, default=5000, help='Port to bind to')
+
+def run(lock_directory: str, host: str = '0.0.0.0', port: int = 5000):
+    """Initialize and run the web dashboard for the given lock directory"""
+    # Flask and Socket.IO are only needed here, so import them on demand
+    from ..web import dashboard
+    
+    dashboard.init_dashboard(lock_directory)
+    print(f"{_markers.START} Starting Nova dashboard...")
+    print(f"   Host: {host}")
+    print(f"   Port: {port}")
+    print(f"   URL: http://localhost:{port}")
+    print(f"   Lock directory: {lock_directory}")
+    print("   Press Ctrl+C to stop")
+    
+    try:
+        dashboard.start_dashboard(host, port)
+    except KeyboardInterrupt:
+        print(f"\n{_markers.STOP} Dashboard stopped")
+    except Exception as e:
+        print(f"\n{_markers.ERR} Dashboard could not start")
+        print(f"   Error: {e}")
+        print(f"   Check if port {port} is available")
+        print(f"   Try a different port: nova dashboard --port 5001")
@@ -0,0 +1,28 @@
+"""
+Status markers for CLI output
+Falls back to plain ASCII when stdout can't encode emoji (e.g. cp1252 Windows consoles)
+"""
+
+import sys
+
+def _stdout_supports_emoji() -> bool:
+    """Check whether the current stdout encoding can represent the emoji markers"""
+    encoding = getattr(sys.stdout, 'encoding', None)
+    if not encoding:
+        return False
+    try:
+        "✅❌🔒🔓📊🔍🤖⏰⚠🚀🛑".encode(encoding)
+        return True
+    except (LookupError, UnicodeEncodeError):
+        return False
+
+if _stdout_supports_emoji():
+    OK, ERR = "✅", "❌"
+    LOCKED, UNLOCKED = "🔒", "🔓"
+    STATS, SEARCH, AUTO, CLOCK, WARN = "📊", "🔍", "🤖", "⏰", "⚠️ "
+    START, STOP = "🚀", "🛑"
+else:
+    OK, ERR = "[OK]", "[ERR]"
+    LOCKED, UNLOCKED = "[LOCKED]", "[UNLOCKED]"
+    STATS, SEARCH, AUTO, CLOCK, WARN = "*", "*", "*", "*", "[!]"
+    START, STOP = "*", "*"
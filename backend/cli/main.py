@@ -6,161 +6,288 @@ Provides command-line tools for managing CAD file locks
 import os
 import sys
 import argparse
+import functools
+import importlib
+import itertools
 import logging
+import operator
+import select
 import signal
+import stat
+import subprocess
+import threading
 import time
-import json
-from pathlib import Path
 from typing import Optional
 
-from ..core.lock_manager import LockManager
-from ..monitor.file_monitor import FileMonitor, ManualFileMonitor
-from ..web.dashboard import start_dashboard, init_dashboard
+from ..core.pidfile import get_pid_file_path, is_process_alive, read_pid
+from . import _markers
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-def get_pid_file_path():
-    """Get the path for the PID file"""
-    if os.name == 'nt':
-        # Windows: Use temp directory
-        return Path(os.getenv('TEMP', 'C:/temp')) / "nova_monitor.pid"
-    else:
-        # Unix-like: Use /var/run or /tmp
-        return Path("/var/run/nova_monitor.pid") if os.access("/var/run", os.W_OK) else Path("/tmp/nova_monitor.pid")
+# Per-lock block printed by `nova list`
+_LIST_SEPARATOR = "-" * 80
+_LIST_LOCK_TEMPLATE = (
+    "File: %s (%s)\n"
+    "User: %s on %s\n"
+    "Created: %s\n"
+    "Last seen: %s\n"
+    "Method: %s (%s)\n"
+    "%s"
+    "Lock ID: %s\n"
+    + _LIST_SEPARATOR
+)
+_list_lock_fields = operator.attrgetter(
+    'file', 'original_path', 'user_name', 'computer_name',
+    'lock_time', 'last_seen', 'detection_method'
+)
+
+# Lock directory -> (LockManager, ManualFileMonitor), shared by NovaCLI instances
+_MANAGER_CACHE = {}
 
 def is_monitor_running():
     """Check if Nova monitor is already running"""
-    pid_file = get_pid_file_path()
-    
-    if not pid_file.exists():
-        return False
-    
+    pid = read_pid(get_pid_file_path())
+    return pid is not None and is_process_alive(pid)
+
+# Windows process access rights used by _terminate_process
+PROCESS_TERMINATE = 0x0001
+SYNCHRONIZE = 0x00100000
+
+# Delays between readiness checks while the background monitor starts up
+_STARTUP_BACKOFF = (0.05, 0.1, 0.2, 0.5, 1.0)
+
+def _wait_for_monitor_start(process, timeout: float = 5.0) -> bool:
+    """
+    Wait until the background monitor has written its PID file
+    
+    Returns as soon as the monitor is running, or as soon as the child
+    process exits. Where available a pidfd is polled so a crashed child
+    is noticed immediately instead of after the next backoff step.
+    """
+    pidfd = None
+    poller = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+        except OSError:
+            pidfd = None
+            poller = None
+    
+    deadline = time.monotonic() + timeout
     try:
-        with open(pid_file, 'r') as f:
-            pid = int(f.read().strip())
-        
-        # Check if process is actually running
-        if os.name == 'nt':
-            # Windows: Use tasklist
-            import subprocess
-            result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'], 
-                                 capture_output=True, text=True)
-            return str(pid) in result.stdout
-        else:
-            # Unix-like: Use kill -0
-            try:
-                os.kill(pid, 0)
+        for delay in itertools.chain(_STARTUP_BACKOFF, itertools.repeat(_STARTUP_BACKOFF[-1])):
+            if is_monitor_running():
                 return True
-            except OSError:
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 return False
-                
-    except (ValueError, IOError):
-        return False
+            delay = min(delay, remaining)
+            
+            if poller is not None:
+                # pidfd becomes readable when the child exits
+                exited = bool(poller.poll(delay * 1000))
+            else:
+                time.sleep(delay)
+                exited = False
+            
+            if exited or process.poll() is not None:
+                process.poll()
+                return is_monitor_running()
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+class _SpawnedProcess:
+    """Minimal Popen stand-in (pid + poll) for a child started with os.posix_spawn"""
+    
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+    
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                self.returncode = 0
+            else:
+                if pid:
+                    self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+def _spawn_monitor_process():
+    """Launch `nova monitor` detached from this terminal session"""
+    cmd = [sys.executable, '-m', 'backend.cli.main', 'monitor']
+    
+    if os.name == 'nt':
+        # Windows: Use start command
+        return subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_CONSOLE)
+    
+    # Unix-like: posix_spawn execs the daemon directly in a new session
+    # without going through subprocess's fork/exec machinery
+    if hasattr(os, 'posix_spawn'):
+        try:
+            return _SpawnedProcess(os.posix_spawn(sys.executable, cmd, os.environ, setsid=True))
+        except NotImplementedError:
+            pass
+    
+    return subprocess.Popen(cmd, start_new_session=True)
 
 def start_background_monitor():
     """Start Nova monitor in background"""
     if is_monitor_running():
-        print("❌ Nova monitor is already running")
+        print(f"{_markers.ERR} Nova monitor is already running")
         return False
     
     # Start the monitor in a new process
-    if os.name == 'nt':
-        # Windows: Use start command
-        import subprocess
-        cmd = [sys.executable, '-m', 'backend.cli.main', 'monitor']
-        subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_CONSOLE)
-    else:
-        # Unix-like: Use daemon process
-        import subprocess
-        cmd = [sys.executable, '-m', 'backend.cli.main', 'monitor']
-        subprocess.Popen(cmd, start_new_session=True)
-    
-    # Wait a moment for process to start
-    time.sleep(2)
+    process = _spawn_monitor_process()
     
-    if is_monitor_running():
-        print("✅ Nova monitor started successfully!")
+    if _wait_for_monitor_start(process):
+        print(f"{_markers.OK} Nova monitor started successfully!")
         print("   Status: Running in background")
         print("   PID file: " + str(get_pid_file_path()))
         print("   Use 'nova status' to check status")
         print("   Use 'nova stop' to stop monitoring")
         return True
     else:
-        print("❌ Nova could not start")
+        print(f"{_markers.ERR} Nova could not start")
         print("   Check error logs at: " + str(get_pid_file_path().parent / "nova_error.log"))
         print("   Try running 'nova monitor' for foreground mode to see errors")
         return False
 
-def stop_background_monitor():
-    """Stop Nova monitor running in background"""
-    if not is_monitor_running():
-        print("❌ Nova monitor is not running")
-        return False
+def _terminate_process(pid: int, timeout: float = 3.0):
+    """
+    Terminate a process and wait for it to exit
+    
+    On Linux the process is signalled through a pidfd, which also protects
+    against the PID having been reused, and the pidfd is polled so we return
+    as soon as it exits. SIGKILL is only sent if it outlives the timeout.
+    """
+    if os.name == 'nt':
+        # Windows: TerminateProcess + wait, without spawning taskkill
+        from ..core.pidfile import kernel32
+        handle = kernel32.OpenProcess(PROCESS_TERMINATE | SYNCHRONIZE, False, pid)
+        if not handle:
+            return
+        try:
+            kernel32.TerminateProcess(handle, 1)
+            kernel32.WaitForSingleObject(handle, int(timeout * 1000))
+        finally:
+            kernel32.CloseHandle(handle)
+        return
     
-    pid_file = get_pid_file_path()
+    pidfd = None
+    if hasattr(os, 'pidfd_open') and hasattr(signal, 'pidfd_send_signal'):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return
+        except OSError:
+            pidfd = None
+    
+    if pidfd is not None:
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            signal.pidfd_send_signal(pidfd, signal.SIGTERM)
+            if not poller.poll(timeout * 1000):
+                # Force kill if still running
+                signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                poller.poll(1000)
+        except ProcessLookupError:
+            pass
+        finally:
+            os.close(pidfd)
+        return
     
+    # Unix-like without pidfd: kill, then poll for exit
     try:
-        with open(pid_file, 'r') as f:
-            pid = int(f.read().strip())
-        
-        # Terminate the process
-        if os.name == 'nt':
-            # Windows: Use taskkill
-            import subprocess
-            subprocess.run(['taskkill', '/PID', str(pid), '/F'], 
-                         capture_output=True)
-        else:
-            # Unix-like: Use kill
-            os.kill(pid, signal.SIGTERM)
-            time.sleep(1)
-            # Force kill if still running
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + timeout
+    while is_process_alive(pid):
+        if time.monotonic() >= deadline:
+            # Force kill only if still running, never a PID that already exited
             try:
                 os.kill(pid, signal.SIGKILL)
             except OSError:
                 pass
+            return
+        time.sleep(0.05)
+
+def stop_background_monitor():
+    """Stop Nova monitor running in background"""
+    pid_file = get_pid_file_path()
+    pid = read_pid(pid_file)
+    if pid is None or not is_process_alive(pid):
+        print(f"{_markers.ERR} Nova monitor is not running")
+        return False
+    
+    try:
+        # Terminate the process
+        _terminate_process(pid)
         
-        # Remove PID file
-        if pid_file.exists():
+        # Remove PID file if the monitor didn't clean it up itself
+        try:
             pid_file.unlink()
+        except FileNotFoundError:
+            pass
         
-        print("✅ Nova monitor stopped")
+        print(f"{_markers.OK} Nova monitor stopped")
         return True
         
-    except (ValueError, IOError) as e:
-        print(f"❌ Error stopping monitor: {e}")
+    except OSError as e:
+        print(f"{_markers.ERR} Error stopping monitor: {e}")
         return False
 
 def get_lock_directory():
     """Get the shared lock directory like CADLock"""
+    return _resolve_lock_directory(os.environ.get('NOVA_LOCKS_DIR'), os.getcwd())
+
+@functools.lru_cache(maxsize=None)
+def _resolve_lock_directory(env_lock_dir: Optional[str], cwd: str) -> str:
+    """Create and validate the lock directory, memoized per (NOVA_LOCKS_DIR, cwd)"""
     # Check for environment variable first (like CADLock)
-    if 'NOVA_LOCKS_DIR' in os.environ:
-        lock_dir = Path(os.environ['NOVA_LOCKS_DIR'])
+    if env_lock_dir:
+        # Fast path: one makedirs + access check, no Path objects or logging.
+        # On failure fall through to the checks below for a proper diagnosis.
+        try:
+            os.makedirs(env_lock_dir, exist_ok=True)
+            if os.access(env_lock_dir, os.W_OK):
+                return env_lock_dir
+        except OSError:
+            pass
+        lock_dir = env_lock_dir
     else:
         # Use platform-appropriate defaults
         if os.name == 'nt':  # Windows
             # Use CADLock-compatible location on Windows
-            lock_dir = Path(r"G:\Shared drives\Cosmic\Engineering\50 - CAD Data\NovaLocks")
+            lock_dir = r"G:\Shared drives\Cosmic\Engineering\50 - CAD Data\NovaLocks"
         else:
             # On macOS/Linux, use local directory for development/testing
             # In production, users should set NOVA_LOCKS_DIR to their shared location
-            lock_dir = Path.cwd() / "locks"
+            lock_dir = os.path.join(cwd, "locks")
             logger.warning("Using local locks directory for development. Set NOVA_LOCKS_DIR for production.")
     
-    # Create directory if it doesn't exist
+    # Create directory if it doesn't exist; a single stat() covers the common case
     try:
-        lock_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            if not stat.S_ISDIR(os.stat(lock_dir).st_mode):
+                raise NotADirectoryError(f"Lock path is not a directory: {lock_dir}")
+        except FileNotFoundError:
+            os.makedirs(lock_dir, exist_ok=True)
         
         # Verify it's writable
         if not os.access(lock_dir, os.W_OK):
             raise PermissionError(f"Cannot write to lock directory: {lock_dir}")
             
-        logger.info(f"Using Nova lock directory: {lock_dir}")
-        return str(lock_dir)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Using Nova lock directory: {lock_dir}")
+        return lock_dir
         
     except (PermissionError, OSError) as e:
         logger.error(f"Failed to create/access lock directory {lock_dir}: {e}")
@@ -176,37 +303,86 @@ class NovaCLI:
     """Command-line interface for Nova system"""
     
     def __init__(self):
-        self.lock_manager = None
         self.file_monitor = None
-        self.manual_monitor = None
+        self._stop_event = threading.Event()
     
-    def setup_lock_manager(self):
-        """Initialize the lock manager"""
+    @functools.cached_property
+    def _managers(self):
+        """(LockManager, ManualFileMonitor) for the lock directory, created on first use"""
         lock_directory = get_lock_directory()
-        self.lock_manager = LockManager(lock_directory)
-        self.manual_monitor = ManualFileMonitor(self.lock_manager)
-        logger.info(f"Lock manager initialized with directory: {lock_directory}")
+        
+        cached = _MANAGER_CACHE.get(lock_directory)
+        if cached is None:
+            from ..core.lock_manager import LockManager
+            from ..monitor.file_monitor import ManualFileMonitor
+            
+            lock_manager = LockManager(lock_directory)
+            cached = (lock_manager, ManualFileMonitor(lock_manager))
+            _MANAGER_CACHE[lock_directory] = cached
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Lock manager initialized with directory: {lock_directory}")
+        
+        return cached
+    
+    @functools.cached_property
+    def lock_manager(self):
+        """Lock manager shared by all commands of this CLI instance"""
+        return self._managers[0]
+    
+    @functools.cached_property
+    def manual_monitor(self):
+        """Manual lock/unlock front end for the lock manager"""
+        return self._managers[1]
+    
+    def setup_lock_manager(self):
+        """Initialize the lock manager eagerly (commands otherwise do it on first use)"""
+        return self._managers
     
     def start_monitor(self, check_interval: float = 2.0):
         """Start automatic file monitoring"""
-        self.setup_lock_manager()
+        from ..monitor.file_monitor import FileMonitor
+        
         self.file_monitor = FileMonitor(self.lock_manager, check_interval=check_interval)
         
         print("Starting CAD file monitoring...")
         print("Press Ctrl+C to stop")
         
+        # Ctrl+C and `nova stop` (SIGTERM) both just wake the wait below, so
+        # the monitor always shuts down cleanly and removes its PID file.
+        # The previous handlers are put back when monitoring ends.
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, self._request_stop)
+        
         try:
-            self.file_monitor.start_monitoring()
+            try:
+                self.file_monitor.start_monitoring()
+            except FileExistsError as e:
+                print(f"{_markers.ERR} {e}")
+                return
             
-            # Keep the main thread alive
-            while True:
-                import time
-                time.sleep(1)
-                
-        except KeyboardInterrupt:
-            print("\nStopping file monitoring...")
-            self.file_monitor.stop_monitoring()
-            print("File monitoring stopped")
+            try:
+                # Block the main thread until asked to stop. An untimed wait can't
+                # be interrupted on Windows, so wake up periodically there.
+                wait_timeout = 1.0 if os.name == 'nt' else None
+                while not self._stop_event.wait(wait_timeout):
+                    pass
+            except KeyboardInterrupt:
+                self._stop_event.set()
+            finally:
+                print("\nStopping file monitoring...")
+                self.file_monitor.stop_monitoring()
+                print("File monitoring stopped")
+        finally:
+            for signum, handler in previous_handlers.items():
+                # None means the handler wasn't installed from Python
+                if handler is not None:
+                    signal.signal(signum, handler)
+    
+    def _request_stop(self, signum=None, frame=None):
+        """Signal handler that ends start_monitor's wait"""
+        self._stop_event.set()
     
     def start_background_monitor(self):
         """Start Nova monitor in background"""
@@ -218,148 +394,174 @@ class NovaCLI:
     
     def status(self):
         """Check if Nova monitor is running"""
-        if is_monitor_running():
-            pid_file = get_pid_file_path()
-            with open(pid_file, 'r') as f:
-                pid = f.read().strip()
-            print(f"✅ Nova monitor is running (PID: {pid})")
+        pid_file = get_pid_file_path()
+        pid = read_pid(pid_file)
+        if pid is not None and is_process_alive(pid):
+            print(f"{_markers.OK} Nova monitor is running (PID: {pid})")
             print(f"   PID file: {pid_file}")
         else:
-            print("❌ Nova monitor is not running")
+            print(f"{_markers.ERR} Nova monitor is not running")
     
     def lock_file(self, file_path: str):
         """Manually lock a CAD file"""
-        self.setup_lock_manager()
-        
-        if not os.path.exists(file_path):
+        # One stat of the CAD file; the lock manager only touches the lock file
+        try:
+            os.stat(file_path)
+        except OSError:
             print(f"Error: File {file_path} does not exist")
             return
         
         success, message = self.manual_monitor.lock_file(file_path)
         if success:
-            print(f"✅ {message}")
+            print(f"{_markers.OK} {message}")
         else:
-            print(f"❌ {message}")
+            print(f"{_markers.ERR} {message}")
     
     def unlock_file(self, file_path: str):
         """Manually unlock a CAD file"""
-        self.setup_lock_manager()
-        
         success, message = self.manual_monitor.unlock_file(file_path)
         if success:
-            print(f"✅ {message}")
+            print(f"{_markers.OK} {message}")
         else:
-            print(f"❌ {message}")
+            print(f"{_markers.ERR} {message}")
     
     def check_lock(self, file_path: str):
         """Check if a file is locked"""
-        self.setup_lock_manager()
-        
         lock_info = self.manual_monitor.check_file_lock(file_path)
         if lock_info:
-            print(f"🔒 File is locked:")
+            print(f"{_markers.LOCKED} File is locked:")
             print(f"   User: {lock_info.user_name}")
             print(f"   Computer: {lock_info.computer_name}")
             print(f"   Locked since: {lock_info.lock_time}")
             if lock_info.process_id:
                 print(f"   Process ID: {lock_info.process_id}")
         else:
-            print("🔓 File is not locked")
+            print(f"{_markers.UNLOCKED} File is not locked")
     
     def unlock_all(self):
         """Unlock all files for the current user"""
-        self.setup_lock_manager()
-        
         count = self.manual_monitor.unlock_all_files()
-        print(f"✅ Unlocked {count} files")
+        print(f"{_markers.OK} Unlocked {count} files")
     
     def cleanup(self, max_age_hours: int = 24):
         """Clean up stale locks"""
-        self.setup_lock_manager()
-        
         count = self.lock_manager.cleanup_stale_locks(max_age_hours)
-        print(f"✅ Cleaned up {count} stale locks")
+        print(f"{_markers.OK} Cleaned up {count} stale locks")
     
     def list_locks(self):
         """List all active locks with rich analytics"""
-        self.setup_lock_manager()
-        
-        locks = self.lock_manager.get_all_locks()
+        # Format locks as they are read; LockInfo objects are never collected.
+        # One formatted block per lock keeps the join list short for large lock sets.
+        out = [None, _LIST_SEPARATOR]
+        out.extend(
+            _LIST_LOCK_TEMPLATE % (*_list_lock_fields(lock),
+                                   'auto' if lock.auto_created else 'manual',
+                                   f"Process: {lock.process_id}\n" if lock.process_id else "",
+                                   lock.lock_id)
+            for lock in self.lock_manager.iter_locks()
+        )
         
-        if not locks:
+        count = len(out) - 2
+        if not count:
             print("No active locks found")
             return
+        out[0] = f"Active locks ({count} total):"
         
-        print(f"Active locks ({len(locks)} total):")
-        print("-" * 80)
-        
-        for lock in locks:
-            print(f"File: {lock.file} ({lock.original_path})")
-            print(f"User: {lock.user_name} on {lock.computer_name}")
-            print(f"Created: {lock.lock_time}")
-            print(f"Last seen: {lock.last_seen}")
-            print(f"Method: {lock.detection_method} ({'auto' if lock.auto_created else 'manual'})")
-            if lock.process_id:
-                print(f"Process: {lock.process_id}")
-            print(f"Lock ID: {lock.lock_id}")
-            print("-" * 80)
+        # Emit everything in one write instead of one print() per line
+        out.append("")
+        sys.stdout.write("\n".join(out))
     
     def show_analytics(self):
         """Show lock analytics dashboard"""
-        self.setup_lock_manager()
-        
         analytics = self.lock_manager.get_lock_analytics()
         
-        print("📊 Nova Lock Analytics")
-        print("=" * 50)
-        print(f"Total active locks: {analytics['total_locks']}")
-        print(f"Active users: {len(analytics['active_users'])}")
-        print(f"User list: {', '.join(analytics['active_users'])}")
-        print()
-        
-        print("🔍 Detection Methods:")
+        out = [
+            f"{_markers.STATS} Nova Lock Analytics",
+            "=" * 50,
+            f"Total active locks: {analytics['total_locks']}",
+            f"Active users: {len(analytics['active_users'])}",
+            f"User list: {', '.join(analytics['active_users'])}",
+            "",
+            f"{_markers.SEARCH} Detection Methods:",
+        ]
         for method, count in analytics['detection_methods'].items():
-            print(f"  {method}: {count}")
-        print()
+            out.append(f"  {method}: {count}")
+        out.append("")
         
-        print("🤖 Creation Type:")
-        print(f"  Automatic: {analytics['auto_vs_manual']['auto']}")
-        print(f"  Manual: {analytics['auto_vs_manual']['manual']}")
-        print()
+        out.append(f"{_markers.AUTO} Creation Type:")
+        out.append(f"  Automatic: {analytics['auto_vs_manual']['auto']}")
+        out.append(f"  Manual: {analytics['auto_vs_manual']['manual']}")
+        out.append("")
         
-        if analytics['lock_ages']:
-            print(f"⏰ Average lock age: {analytics['average_lock_age']:.1f} hours")
-            print(f"⚠️  Stale locks (>4h inactive): {analytics['stale_locks']}")
+        if analytics['total_locks']:
+            out.append(f"{_markers.CLOCK} Average lock age: {analytics['average_lock_age']:.1f} hours")
+            out.append(f"{_markers.WARN} Stale locks (>4h inactive): {analytics['stale_locks']}")
         
-        print("=" * 50)
+        out.append("=" * 50)
+        out.append("")
+        sys.stdout.write("\n".join(out))
     
     def start_dashboard(self, host: str = '0.0.0.0', port: int = 5000):
         """Start the web dashboard"""
-        lock_directory = get_lock_directory()
-        init_dashboard(lock_directory)
-        print(f"🚀 Starting Nova dashboard...")
-        print(f"   Host: {host}")
-        print(f"   Port: {port}")
-        print(f"   URL: http://localhost:{port}")
-        print(f"   Lock directory: {lock_directory}")
-        print("   Press Ctrl+C to stop")
+        from . import _dashboard
         
-        try:
-            start_dashboard(host=host, port=port)
-        except KeyboardInterrupt:
-            print("\n🛑 Dashboard stopped")
-        except Exception as e:
-            print(f"\n❌ Dashboard could not start")
-            print(f"   Error: {e}")
-            print(f"   Check if port {port} is available")
-            print(f"   Try a different port: nova dashboard --port 5001")
+        _dashboard.run(get_lock_directory(), host, port)
 
-def main():
-    """Main CLI entry point"""
-    parser = argparse.ArgumentParser(
-        description="Nova - CAD file locking system",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+def _add_file_path(help_text):
+    """Return a subparser builder that adds a single file_path argument"""
+    def build(subparser):
+        subparser.add_argument('file_path', help=help_text)
+    return build
+
+def _build_monitor_parser(subparser):
+    subparser.add_argument('--check-interval', type=float, default=2.0, help='Check interval in seconds')
+
+def _build_cleanup_parser(subparser):
+    subparser.add_argument('--max-age', type=int, default=24, help='Maximum age in hours')
+
+def _lazy_builder(module_name):
+    """Return a subparser builder that imports the command's module only when selected"""
+    def build(subparser):
+        importlib.import_module(f'.{module_name}', __package__).add_arguments(subparser)
+    return build
+
+# Commands that run long enough for INFO-level logging to be useful
+LOGGING_COMMANDS = {'monitor', 'dashboard', 'cleanup'}
+
+# Command name -> (help text, argument builder). Builders only run for the
+# selected command so unused subparsers stay empty.
+COMMANDS = {
+    'monitor': ('Start automatic file monitoring', _build_monitor_parser),
+    'start': ('Start Nova monitor in background', None),
+    'stop': ('Stop Nova monitor running in background', None),
+    'status': ('Check if Nova monitor is running', None),
+    'lock': ('Manually lock a CAD file', _add_file_path('Path to the CAD file to lock')),
+    'unlock': ('Manually unlock a CAD file', _add_file_path('Path to the CAD file to unlock')),
+    'check': ('Check if a file is locked', _add_file_path('Path to the CAD file to check')),
+    'unlock-all': ('Unlock all files for current user', None),
+    'cleanup': ('Clean up stale locks - default older than24 hours', _build_cleanup_parser),
+    'list': ('List all active locks with details', None),
+    'analytics': ('Show lock analytics dashboard', None),
+    'dashboard': ('Start web dashboard', _lazy_builder('_dashboard')),
+}
+
+# Command name -> handler taking (NovaCLI, parsed args)
+DISPATCH = {
+    'monitor': lambda cli, args: cli.start_monitor(args.check_interval),
+    'start': lambda cli, args: cli.start_background_monitor(),
+    'stop': lambda cli, args: cli.stop_background_monitor(),
+    'status': lambda cli, args: cli.status(),
+    'lock': lambda cli, args: cli.lock_file(args.file_path),
+    'unlock': lambda cli, args: cli.unlock_file(args.file_path),
+    'check': lambda cli, args: cli.check_lock(args.file_path),
+    'unlock-all': lambda cli, args: cli.unlock_all(),
+    'cleanup': lambda cli, args: cli.cleanup(args.max_age),
+    'list': lambda cli, args: cli.list_locks(),
+    'analytics': lambda cli, args: cli.show_analytics(),
+    'dashboard': lambda cli, args: cli.start_dashboard(args.host, args.port),
+}
+
+EPILOG = """
 Examples:
   # Start automatic monitoring in background
   nova start
@@ -395,87 +597,59 @@ Shared Lock Directory (like CADLock):
   Set NOVA_LOCKS_DIR environment variable or auto-detects:
   Windows: \\\\server\\shared\\Nova\\Locks, G:\\Shared drives\\Engineering\\Nova\\Locks
   Linux/Mac: /mnt/shared/nova/locks, /shared/nova/locks
-        """
+"""
+
+@functools.lru_cache(maxsize=None)
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Build the argument parser, adding arguments only for the given command
+
+    Parsers are cached per command so embedding callers (tests, shells)
+    don't rebuild them on every invocation.
+    """
+    parser = argparse.ArgumentParser(
+        description="Nova - CAD file locking system",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG
     )
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
-    # Monitor command
-    monitor_parser = subparsers.add_parser('monitor', help='Start automatic file monitoring')
-    monitor_parser.add_argument('--check-interval', type=float, default=2.0, help='Check interval in seconds')
-    
-    # Start command
-    start_parser = subparsers.add_parser('start', help='Start Nova monitor in background')
-    
-    # Stop command
-    stop_parser = subparsers.add_parser('stop', help='Stop Nova monitor running in background')
-    
-    # Status command
-    status_parser = subparsers.add_parser('status', help='Check if Nova monitor is running')
-    
-    # Lock command
-    lock_parser = subparsers.add_parser('lock', help='Manually lock a CAD file')
-    lock_parser.add_argument('file_path', help='Path to the CAD file to lock')
-    
-    # Unlock command
-    unlock_parser = subparsers.add_parser('unlock', help='Manually unlock a CAD file')
-    unlock_parser.add_argument('file_path', help='Path to the CAD file to unlock')
-    
-    # Check command
-    check_parser = subparsers.add_parser('check', help='Check if a file is locked')
-    check_parser.add_argument('file_path', help='Path to the CAD file to check')
-    
-    # Unlock all command
-    unlock_all_parser = subparsers.add_parser('unlock-all', help='Unlock all files for current user')
+    for name, (help_text, builder) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if builder and name == command:
+            builder(subparser)
     
-    # Cleanup command
-    cleanup_parser = subparsers.add_parser('cleanup', help='Clean up stale locks - default older than24 hours')
-    cleanup_parser.add_argument('--max-age', type=int, default=24, help='Maximum age in hours')
-    
-    # List command
-    list_parser = subparsers.add_parser('list', help='List all active locks with details')
-    
-    # Analytics command
-    analytics_parser = subparsers.add_parser('analytics', help='Show lock analytics dashboard')
+    return parser
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments, skipping argparse for bare zero-argument commands"""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv and argv[0] in COMMANDS else None
     
-    # Dashboard command
-    dashboard_parser = subparsers.add_parser('dashboard', help='Start web dashboard')
-    dashboard_parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
-    dashboard_parser.add_argument('--port', type=int, default=5000, help='Port to bind to')
+    if len(argv) == 1 and command is not None and COMMANDS[command][1] is None:
+        return argparse.Namespace(command=command)
     
-    args = parser.parse_args()
+    # --help, global options and unknown commands all share the full parser
+    return build_parser(command).parse_args(argv)
+
+def main():
+    """Main CLI entry point"""
+    args = parse_args()
     
     if not args.command:
-        parser.print_help()
+        build_parser().print_help()
         return
     
+    if args.command in LOGGING_COMMANDS:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+    
     cli = NovaCLI()
     
     try:
-        if args.command == 'monitor':
-            cli.start_monitor(args.check_interval)
-        elif args.command == 'start':
-            cli.start_background_monitor()
-        elif args.command == 'stop':
-            cli.stop_background_monitor()
-        elif args.command == 'status':
-            cli.status()
-        elif args.command == 'lock':
-            cli.lock_file(args.file_path)
-        elif args.command == 'unlock':
-            cli.unlock_file(args.file_path)
-        elif args.command == 'check':
-            cli.check_lock(args.file_path)
-        elif args.command == 'unlock-all':
-            cli.unlock_all()
-        elif args.command == 'cleanup':
-            cli.cleanup(args.max_age)
-        elif args.command == 'list':
-            cli.list_locks()
-        elif args.command == 'analytics':
-            cli.show_analytics()
-        elif args.command == 'dashboard':
-            cli.start_dashboard(args.host, args.port)
+        DISPATCH[args.command](cli, args)
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
@@ -2,6 +2,12 @@
 Core components for Nova system
 """
 
-from .lock_manager import LockManager, LockInfo
-
 __all__ = ['LockManager', 'LockInfo']
+
+def __getattr__(name):
+    # Loaded on first use so light submodules (pidfile) don't pull in the
+    # lock manager and its dependencies
+    if name in __all__:
+        from . import lock_manager
+        return getattr(lock_manager, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
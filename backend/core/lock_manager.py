@@ -4,17 +4,152 @@ Handles lock creation, validation, and cleanup
 """
 
 import os
+import atexit
+import errno
 import json
 import time
 import hashlib
+import functools
+import struct
+import threading
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from dataclasses import MISSING, dataclass, fields
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Lock files are read in parallel once a directory holds at least this many;
+# below that the thread pool costs more than the reads on a local disk
+PARALLEL_READ_THRESHOLD = 16
+# Reads mostly wait on I/O, so oversubscribe the CPUs, but keep small
+# machines from spawning dozens of threads for one sweep
+MAX_READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Default supported CAD file extensions
+DEFAULT_EXTENSIONS = (
+    '.sldprt', '.sldasm', '.slddrw',  # SolidWorks
+    '.prt', '.asm', '.drw',           # Pro/Engineer, Creo
+    '.ipt', '.iam', '.idw',           # Inventor
+    '.dwg', '.dxf',                   # AutoCAD
+    '.f3d', '.f3z',                   # Fusion 360
+    '.step', '.stp', '.iges', '.igs'  # Neutral formats
+)
+
+# Characters CADLock replaces with '_' when naming lock files
+_SANITIZE_TABLE = str.maketrans({c: '_' for c in '\\/:*?"<>| '})
+
+# Upper bound on memoized get_lock_file_path results per manager
+PATH_CACHE_SIZE = 4096
+
+# Locks without activity for this long are considered abandoned
+LOCK_EXPIRY_SECONDS = 24 * 3600
+
+# An unreadable lock file younger than this is taken to be another client's
+# lock that is still being written, not a corrupted one
+NEW_LOCK_GRACE_SECONDS = 10
+
+# os.link errors meaning the lock directory doesn't support hard links
+# (FAT/exFAT, some network shares); locks are then created in place
+_NO_HARD_LINK_ERRNOS = frozenset({errno.EPERM, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP})
+
+# DirEntry.stat() leaves st_ino at zero on Windows, so lock files found by a
+# scan are stat'ed individually there to get keys comparable with os.stat()
+_DIRENTRY_HAS_INODE = os.name != 'nt'
+
+# Buffered heartbeats (update_lock_activity) are written back this often
+HEARTBEAT_FLUSH_INTERVAL = 0.5
+
+def _load_lock_data(lock_file) -> dict:
+    """Parse a lock file, using orjson when it is installed"""
+    with open(lock_file, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _stat_key(st: os.stat_result) -> Tuple[int, int, int]:
+    """
+    Version of a lock file as (st_ino, st_mtime_ns, st_size)
+    
+    Every rewrite replaces the file, so the inode tells apart same-size
+    heartbeats that land within a network share's coarse mtime resolution.
+    """
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _unlink_quietly(path: str):
+    """Delete a file that may already be gone"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _create_lock_file_in_place(lock_file: Union[str, Path], data: bytes) -> os.stat_result:
+    """
+    Create a lock file with O_EXCL and write it, for directories without
+    hard links; the file is briefly visible empty
+    
+    Raises:
+        FileExistsError: If the lock file already exists
+    """
+    fd = os.open(lock_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+            return os.fstat(fd)
+        finally:
+            os.close(fd)
+    except BaseException:
+        # Don't leave a partial lock for a create that reports failure
+        _unlink_quietly(lock_file)
+        raise
+
+def _dump_lock_data(lock_data: dict) -> bytes:
+    """Serialize lock data as compact JSON (lock files are machine-read)"""
+    if orjson is not None:
+        return orjson.dumps(lock_data)
+    return json.dumps(lock_data, separators=(',', ':')).encode()
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def _path_digest(file_path: str) -> str:
+    """
+    MD5 hex digest of a CAD file path
+    
+    Lock file names embed its first 8 characters, so it has to stay MD5 for
+    every client sharing a lock directory to agree on them. create_lock reuses
+    the same digest for file_hash instead of hashing the path a second time.
+    """
+    return hashlib.md5(file_path.encode()).hexdigest()
+
+def _new_lock_id(file_path: str, now: float) -> str:
+    """Unique id for a new lock: 128-bit BLAKE2b of the path and creation time"""
+    h = hashlib.blake2b(file_path.encode(), digest_size=16)
+    h.update(struct.pack('<d', now))
+    return h.hexdigest()
+
+def _parse_timestamp(value) -> Optional[float]:
+    """Convert a lock_time/last_seen display string to epoch seconds (None if malformed)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def _lock_times(lock_data: dict) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Epoch seconds for a lock's lock_time and last_seen
+    
+    Computed once whenever a lock file is (re)read or written and kept in the
+    index next to the data, so sweeps don't parse the display strings again.
+    """
+    return _parse_timestamp(lock_data.get('lock_time')), _parse_timestamp(lock_data.get('last_seen'))
+
 @dataclass
 class LockInfo:
     """Information about a file lock - enhanced with CADLock analytics"""
@@ -43,51 +178,280 @@ class LockInfo:
     process_id: Optional[int] = None
     file_hash: Optional[str] = None
 
+# LockInfo is flat, so a shallow field copy is all asdict() would produce
+_LOCKINFO_FIELDS = tuple(f.name for f in fields(LockInfo))
+_LOCKINFO_FIELD_SET = frozenset(_LOCKINFO_FIELDS)
+_REQUIRED_FIELDS = frozenset(f.name for f in fields(LockInfo) if f.default is MISSING)
+
+def _to_dict(lock_info: LockInfo) -> dict:
+    """Convert a LockInfo to a plain dict for writing to disk"""
+    return {name: getattr(lock_info, name) for name in _LOCKINFO_FIELDS}
+
 class LockManager:
     """Manages file locks for CAD files"""
     
-    def __init__(self, lock_directory: str, supported_extensions: List[str] = None):
+    def __init__(self, lock_directory: str, supported_extensions: List[str] = None,
+                 flush_interval: float = HEARTBEAT_FLUSH_INTERVAL):
         """
         Initialize the lock manager
         
         Args:
             lock_directory: Directory to store lock files
             supported_extensions: List of supported file extensions
+            flush_interval: Seconds between write-backs of buffered heartbeats
         """
         self.lock_directory = Path(lock_directory)
         self.lock_directory.mkdir(parents=True, exist_ok=True)
         
-        # Default supported CAD file extensions
-        self.supported_extensions = supported_extensions or [
-            '.sldprt', '.sldasm', '.slddrw',  # SolidWorks
-            '.prt', '.asm', '.drw',           # Pro/Engineer, Creo
-            '.ipt', '.iam', '.idw',           # Inventor
-            '.dwg', '.dxf',                   # AutoCAD
-            '.f3d', '.f3z',                   # Fusion 360
-            '.step', '.stp', '.iges', '.igs'  # Neutral formats
-        ]
+        # Lower-cased set for O(1) lookups in is_cad_file
+        self.supported_extensions = frozenset(
+            ext.lower() for ext in (supported_extensions or DEFAULT_EXTENSIONS)
+        )
         
-        logger.info(f"Lock manager initialized with directory: {self.lock_directory}")
-        logger.info(f"Supported extensions: {self.supported_extensions}")
+        # Lock file name -> (_stat_key of the file, parsed lock data,
+        # (lock_time, last_seen) as epoch seconds). Entries are revalidated
+        # against the file's stat on every read, so locks written by other
+        # machines on the share are still picked up; only unchanged files
+        # skip the open/read/parse. The epochs live here rather than in the
+        # lock file so older clients sharing the directory can still read it.
+        self._index: Dict[str, Tuple[Tuple[int, int, int], dict, Tuple[Optional[float], Optional[float]]]] = {}
+        self._index_lock = threading.RLock()
+        
+        # CAD file path -> lock file path, see get_lock_file_path
+        self._path_cache: Dict[str, Path] = {}
+        
+        # Heartbeats only touch the index; a background thread writes the
+        # dirty lock files back, coalescing repeated heartbeats per lock
+        self.flush_interval = flush_interval
+        self._dirty: Dict[str, Path] = {}
+        self._flush_lock = threading.Lock()
+        self._flush_thread = None
+        self._stop_flush = threading.Event()
+        self._atexit_registered = False
+        
+        # Short-lived CLI commands log at WARNING; skip formatting these
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Lock manager initialized with directory: %s", self.lock_directory)
+            logger.info("Supported extensions: %s", sorted(self.supported_extensions))
+    
+    def reload(self):
+        """Drop cached lock data so the next read re-parses every lock file"""
+        with self._index_lock:
+            self._index.clear()
+    
+    def _load_lock(self, lock_file: Union[str, Path], st: Optional[os.stat_result] = None
+                   ) -> Tuple[dict, Tuple[Optional[float], Optional[float]]]:
+        """
+        Return the parsed contents of a lock file and its (lock_time, last_seen)
+        epoch seconds
+        
+        The file is only opened and parsed if its mtime or size changed since
+        it was last read. The returned dict is shared with the index and must
+        not be mutated.
+        
+        Raises:
+            FileNotFoundError: If the lock file doesn't exist
+        """
+        if st is None:
+            st = os.stat(lock_file)
+        key = _stat_key(st)
+        name = os.path.basename(lock_file)
+        
+        cached = self._index.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+        
+        lock_data = _load_lock_data(lock_file)
+        times = _lock_times(lock_data)
+        with self._index_lock:
+            self._index[name] = (key, lock_data, times)
+        return lock_data, times
+    
+    def _write_lock(self, lock_file: Union[str, Path], lock_data: dict, exclusive: bool = False):
+        """Write a lock file and record its new contents in the index"""
+        st = self._write_lock_file(lock_file, lock_data, exclusive)
+        with self._index_lock:
+            self._index[os.path.basename(lock_file)] = (_stat_key(st), lock_data, _lock_times(lock_data))
+    
+    def _write_lock_file(self, lock_file: Union[str, Path], lock_data: dict,
+                         exclusive: bool = False) -> os.stat_result:
+        """
+        Write a lock file without touching the index and return its stat
+        
+        The contents always go to a temporary file first, so readers never
+        see a half-written lock file. With exclusive=True the temporary file
+        is fsynced, since it is the lock itself, and hard-linked to the lock
+        file name, which raises FileExistsError instead of overwriting a lock
+        someone else holds. Otherwise it is renamed over the old lock file.
+        """
+        data = _dump_lock_data(lock_data)
+        # Unique per thread: every manager and flusher in this process
+        # may be writing the same lock file
+        tmp_path = f"{lock_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            try:
+                os.write(fd, data)
+                if exclusive:
+                    os.fsync(fd)
+                st = os.fstat(fd)
+            finally:
+                os.close(fd)
+            if not exclusive:
+                os.replace(tmp_path, lock_file)
+                return st
+            try:
+                os.link(tmp_path, lock_file)
+            except OSError as e:
+                if isinstance(e, FileExistsError) or e.errno not in _NO_HARD_LINK_ERRNOS:
+                    raise
+                st = _create_lock_file_in_place(lock_file, data)
+        except BaseException:
+            # Don't leave an orphaned temp file behind
+            _unlink_quietly(tmp_path)
+            raise
+        # The lock file is now a second link to the same data
+        _unlink_quietly(tmp_path)
+        return st
+    
+    def _unlink_lock(self, lock_file: Union[str, Path]):
+        """Delete a lock file and forget its cached contents"""
+        name = os.path.basename(lock_file)
+        # _flush_lock keeps an in-flight heartbeat write-back from
+        # re-creating the file right after it is removed
+        with self._flush_lock:
+            with self._index_lock:
+                self._index.pop(name, None)
+                self._dirty.pop(name, None)
+            os.unlink(lock_file)
+    
+    def _unlink_locks(self, victims: List[Tuple[str, os.stat_result]]) -> int:
+        """
+        Delete a batch of (lock_file, stat seen while scanning) and return
+        how many were removed
+        
+        Each file is re-stat'ed right before its unlink and kept if it changed
+        since the scan, so a lock that someone re-created while the sweep was
+        running survives. Failures are logged, not raised.
+        """
+        removed = []
+        with self._flush_lock:
+            for lock_file, scanned in victims:
+                try:
+                    st = os.stat(lock_file)
+                    if _stat_key(st) != _stat_key(scanned):
+                        logger.info("Keeping lock file changed since the scan: %s", lock_file)
+                        continue
+                    os.unlink(lock_file)
+                    removed.append(os.path.basename(lock_file))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error("Failed to remove lock file %s: %s", lock_file, e)
+            
+            with self._index_lock:
+                for name in removed:
+                    self._index.pop(name, None)
+                    self._dirty.pop(name, None)
+        return len(removed)
+    
+    def flush(self):
+        """
+        Write buffered heartbeats back to their lock files
+        
+        Only the swap of the dirty set happens under _index_lock; the lock
+        files are read and rewritten outside it, so lookups and heartbeats
+        aren't held up by a slow share.
+        """
+        with self._flush_lock:
+            with self._index_lock:
+                dirty, self._dirty = self._dirty, {}
+                pending = []
+                for name, lock_file in dirty.items():
+                    cached = self._index.get(name)
+                    if cached is not None:
+                        pending.append((name, lock_file, cached[1]))
+            
+            for name, lock_file, lock_data in pending:
+                try:
+                    # Only touch the lock we heartbeated; it may have been
+                    # removed or re-created by someone else in the meantime
+                    on_disk = _load_lock_data(lock_file)
+                    if on_disk.get('lock_id') != lock_data.get('lock_id'):
+                        continue
+                    
+                    on_disk['last_seen'] = lock_data['last_seen']
+                    st = self._write_lock_file(lock_file, on_disk)
+                    
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.error("Failed to flush lock activity for %s: %s", lock_file, e)
+                    continue
+                
+                key = _stat_key(st)
+                with self._index_lock:
+                    cached = self._index.get(name)
+                    if name in self._dirty and cached is not None:
+                        # Heartbeated again while we wrote; keep the newer
+                        # data for the next flush but record the new stat
+                        self._index[name] = (key, cached[1], cached[2])
+                    else:
+                        self._index[name] = (key, on_disk, _lock_times(on_disk))
+    
+    def close(self):
+        """Stop the heartbeat flusher and write any buffered heartbeats"""
+        self._stop_flush.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=5.0)
+            self._flush_thread = None
+        self.flush()
+        
+        # Let the manager be garbage collected once the caller drops it
+        if self._atexit_registered:
+            atexit.unregister(self.close)
+            self._atexit_registered = False
+    
+    def _flush_loop(self):
+        """Background write-back of buffered heartbeats"""
+        while not self._stop_flush.wait(self.flush_interval):
+            self.flush()
+    
+    def _ensure_flusher(self):
+        """Start the heartbeat flusher on first use"""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        
+        self._stop_flush.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        
+        # The flusher is a daemon thread; don't lose the last heartbeats on exit
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
     
     def is_cad_file(self, file_path: str) -> bool:
         """Check if a file is a supported CAD file"""
-        return Path(file_path).suffix.lower() in self.supported_extensions
+        return os.path.splitext(file_path)[1].lower() in self.supported_extensions
     
     def get_lock_file_path(self, file_path: str) -> Path:
         """Get the path for the lock file corresponding to a CAD file (CADLock style)"""
+        lock_file_path = self._path_cache.get(file_path)
+        if lock_file_path is not None:
+            return lock_file_path
+        
         # Convert path to filesystem-safe name like CADLock
-        rel_path = os.path.basename(file_path)  # Start with filename
-        safe_path = rel_path.replace('\\', '_').replace('/', '_').replace(':', '_')
-        safe_path = safe_path.replace('*', '_').replace('?', '_').replace('"', '_')
-        safe_path = safe_path.replace('<', '_').replace('>', '_').replace('|', '_')
-        safe_path = safe_path.replace(' ', '_')  # Also replace spaces
+        safe_path = os.path.basename(file_path).translate(_SANITIZE_TABLE)
         
         # Add hash prefix to ensure uniqueness for files with same name
-        file_hash = hashlib.md5(file_path.encode()).hexdigest()[:8]
-        lock_filename = f"{file_hash}_{safe_path}.lock"
+        file_hash = _path_digest(file_path)[:8]
+        lock_file_path = self.lock_directory / f"{file_hash}_{safe_path}.lock"
         
-        return self.lock_directory / lock_filename
+        if len(self._path_cache) >= PATH_CACHE_SIZE:
+            self._path_cache.clear()
+        self._path_cache[file_path] = lock_file_path
+        return lock_file_path
     
     def create_lock(self, file_path: str, user_name: str, computer_name: str, 
                    process_id: Optional[int] = None, auto_created: bool = False,
@@ -111,28 +475,9 @@ class LockManager:
         
         lock_file_path = self.get_lock_file_path(file_path)
         
-        # Check if file is already locked
-        if lock_file_path.exists():
-            try:
-                with open(lock_file_path, 'r') as f:
-                    existing_lock = json.load(f)
-                
-                # Check if lock is stale using last_seen if available
-                last_activity = existing_lock.get('last_seen', existing_lock.get('lock_time'))
-                if last_activity:
-                    last_time = datetime.fromisoformat(last_activity)
-                    if datetime.now() - last_time > timedelta(hours=24):
-                        logger.warning(f"Removing stale lock for {file_path}")
-                        lock_file_path.unlink()
-                    else:
-                        return False, f"File is locked by {existing_lock['user_name']} on {existing_lock['computer_name']}"
-                
-            except (json.JSONDecodeError, KeyError):
-                # Corrupted lock file, remove it
-                lock_file_path.unlink()
-        
         # Create new lock with rich analytics (CADLock format)
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = time.time()
+        current_time = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
         lock_info = LockInfo(
             # File information
             file_path=file_path,
@@ -149,7 +494,7 @@ class LockManager:
             
             # Lock metadata
             lock_file=str(lock_file_path),
-            lock_id=hashlib.md5(f"{file_path}{time.time()}".encode()).hexdigest(),
+            lock_id=_new_lock_id(file_path, now),
             
             # Analytics (like CADLock)
             auto_created=auto_created,
@@ -157,20 +502,65 @@ class LockManager:
             
             # Optional
             process_id=process_id,
-            file_hash=hashlib.md5(file_path.encode()).hexdigest()
+            file_hash=_path_digest(file_path)
         )
         
         try:
-            with open(lock_file_path, 'w') as f:
-                json.dump(asdict(lock_info), f, indent=2)
+            # Create the lock file atomically; if one already exists, clear it
+            # when stale or corrupted and retry once
+            lock_data = _to_dict(lock_info)
+            for attempt in range(2):
+                try:
+                    self._write_lock(lock_file_path, lock_data, exclusive=True)
+                    break
+                except FileExistsError:
+                    refusal = self._check_existing_lock(lock_file_path, file_path)
+                    if refusal:
+                        return False, refusal
+                    if attempt:
+                        return False, f"File {file_path} was locked concurrently, try again"
             
-            logger.info(f"Created {detection_method} lock for {file_path} by {user_name}")
+            logger.info("Created %s lock for %s by %s", detection_method, file_path, user_name)
             return True, f"Lock created successfully"
             
         except Exception as e:
-            logger.error(f"Failed to create lock for {file_path}: {e}")
+            logger.error("Failed to create lock for %s: %s", file_path, e)
             return False, f"Failed to create lock: {e}"
     
+    def _check_existing_lock(self, lock_file_path: Path, file_path: str) -> Optional[str]:
+        """
+        Inspect a lock file that blocked create_lock
+        
+        Stale and corrupted locks are removed, unless the file changed since
+        it was read (another client may have just re-created it). Returns a
+        refusal message if the lock is still held, otherwise None.
+        """
+        try:
+            st = os.stat(lock_file_path)
+            existing_lock, (lock_time, last_seen) = self._load_lock(lock_file_path, st)
+            
+            # Check if lock is stale using last_seen if available
+            activity_field = 'last_seen' if existing_lock.get('last_seen') else 'lock_time'
+            if existing_lock.get(activity_field):
+                activity = last_seen if activity_field == 'last_seen' else lock_time
+                if activity is None:
+                    raise ValueError(f"malformed {activity_field}")
+                if time.time() - activity > LOCK_EXPIRY_SECONDS:
+                    logger.warning("Removing stale lock for %s", file_path)
+                    self._unlink_locks([(lock_file_path, st)])
+                else:
+                    return f"File is locked by {existing_lock['user_name']} on {existing_lock['computer_name']}"
+            
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            # Corrupted lock file (JSONDecodeError is a ValueError), remove it
+            # unless it was only just created and is still being written
+            if time.time() - st.st_mtime < NEW_LOCK_GRACE_SECONDS:
+                return f"File {file_path} is being locked by another user, try again"
+            self._unlink_locks([(lock_file_path, st)])
+        return None
+    
     def remove_lock(self, file_path: str, user_name: str) -> Tuple[bool, str]:
         """
         Remove a lock for a CAD file
@@ -180,75 +570,173 @@ class LockManager:
         """
         lock_file_path = self.get_lock_file_path(file_path)
         
-        if not lock_file_path.exists():
-            return False, f"No lock found for {file_path}"
-        
         try:
-            with open(lock_file_path, 'r') as f:
-                lock_info = json.load(f)
+            lock_info, _ = self._load_lock(lock_file_path)
             
             # Only allow the user who created the lock to remove it
             if lock_info['user_name'] != user_name:
                 return False, f"Lock belongs to {lock_info['user_name']}, not {user_name}"
             
-            lock_file_path.unlink()
-            logger.info(f"Removed lock for {file_path} by {user_name}")
+            self._unlink_lock(lock_file_path)
+            logger.info("Removed lock for %s by %s", file_path, user_name)
             return True, f"Lock removed successfully"
             
+        except FileNotFoundError:
+            return False, f"No lock found for {file_path}"
         except Exception as e:
-            logger.error(f"Failed to remove lock for {file_path}: {e}")
+            logger.error("Failed to remove lock for %s: %s", file_path, e)
             return False, f"Failed to remove lock: {e}"
     
     def check_lock(self, file_path: str) -> Optional[LockInfo]:
         """Check if a file is locked and return lock information"""
+        # The lock file name is derived from the path, so this is a single
+        # stat of one file; a missing file simply means "not locked"
         lock_file_path = self.get_lock_file_path(file_path)
         
-        if not lock_file_path.exists():
-            return None
-        
         try:
-            with open(lock_file_path, 'r') as f:
-                lock_data = json.load(f)
+            lock_data, (lock_time, _) = self._load_lock(lock_file_path)
+            if lock_time is None:
+                raise ValueError(f"malformed lock_time {lock_data.get('lock_time')!r}")
             
             # Check if lock is stale
-            lock_time = datetime.fromisoformat(lock_data['lock_time'])
-            if datetime.now() - lock_time > timedelta(hours=24):
-                logger.warning(f"Found stale lock for {file_path}, removing")
-                lock_file_path.unlink()
+            if time.time() - lock_time > LOCK_EXPIRY_SECONDS:
+                logger.warning("Found stale lock for %s, removing", file_path)
+                self._unlink_lock(lock_file_path)
                 return None
             
             return LockInfo(**lock_data)
             
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            logger.error(f"Error reading lock file for {file_path}: {e}")
+            logger.error("Error reading lock file for %s: %s", file_path, e)
             return None
     
+    def snapshot_key(self) -> frozenset:
+        """
+        Cheap fingerprint of the lock directory
+        
+        A set of (name, st_ino, st_mtime_ns, st_size) for every lock file,
+        taken with one scandir and no reads. It changes whenever a lock is
+        created, removed or rewritten, by this process or another machine, so
+        callers can cache anything derived from get_all_locks() against it.
+        """
+        key = []
+        with os.scandir(self.lock_directory) as entries:
+            for entry in entries:
+                if not (entry.name.endswith('.lock') and entry.is_file()):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                key.append((entry.name, *_stat_key(st)))
+        return frozenset(key)
+    
     def get_all_locks(self) -> List[LockInfo]:
         """Get all active locks"""
-        locks = []
+        return list(self.iter_locks())
+    
+    def iter_locks(self) -> Iterator[LockInfo]:
+        """
+        Iterate over active locks one lock file at a time
         
-        for lock_file in self.lock_directory.glob("*.lock"):
-            try:
-                with open(lock_file, 'r') as f:
-                    lock_data = json.load(f)
-                
-                lock_info = LockInfo(**lock_data)
-                
-                # Check if lock is stale
-                lock_time = datetime.fromisoformat(lock_data['lock_time'])
-                if datetime.now() - lock_time > timedelta(hours=24):
-                    logger.warning(f"Removing stale lock: {lock_file}")
-                    lock_file.unlink()
+        Stale and corrupted lock files are removed as they are encountered,
+        exactly as in get_all_locks, but callers that only need to fold over
+        the locks never hold the full list in memory.
+        """
+        for lock_data, _, _ in self._iter_locks_raw():
+            yield LockInfo(**lock_data)
+    
+    def _iter_locks_raw(self) -> Iterator[Tuple[dict, float, Optional[float]]]:
+        """
+        Like iter_locks, but yield (lock_data, lock_time, last_seen) with the
+        validated lock dicts themselves and their epoch timestamps
+        
+        The dicts are shared with the index and must not be modified.
+        """
+        # One clock read per sweep; staleness is measured in hours anyway
+        now = time.time()
+        
+        for lock_file, st, lock_data, (lock_time, last_seen), error in self._iter_lock_data():
+            if error is None:
+                # Same fields LockInfo(**lock_data) would accept
+                keys = lock_data.keys()
+                if not (_REQUIRED_FIELDS <= keys and keys <= _LOCKINFO_FIELD_SET):
+                    error = ValueError(f"unexpected lock fields: {sorted(keys ^ _LOCKINFO_FIELD_SET)}")
+                elif lock_time is None:
+                    error = ValueError(f"malformed lock_time {lock_data['lock_time']!r}")
+            
+            if error is not None:
+                # A lock file that was only just created may still be being
+                # written by another client; skip it rather than remove it
+                if now - st.st_mtime < NEW_LOCK_GRACE_SECONDS:
                     continue
-                
-                locks.append(lock_info)
-                
+                logger.error("Error reading lock file %s: %s", lock_file, error)
+                # Remove corrupted lock file (unless it changed since the scan)
+                self._unlink_locks([(lock_file, st)])
+                continue
+            
+            # Check if lock is stale
+            if now - lock_time > LOCK_EXPIRY_SECONDS:
+                logger.warning("Removing stale lock: %s", lock_file)
+                self._unlink_locks([(lock_file, st)])
+                continue
+            
+            yield lock_data, lock_time, last_seen
+    
+    def _iter_lock_data(self, modified_before: Optional[float] = None
+                        ) -> Iterator[Tuple[str, os.stat_result, Optional[dict],
+                                            Tuple[Optional[float], Optional[float]], Optional[Exception]]]:
+        """
+        Yield (lock_file, st, lock_data, (lock_time, last_seen), error) for
+        every lock file in the directory, st being the stat taken while scanning
+        
+        Unchanged files are served from the index after a single stat. When
+        many files need reading they are read with a thread pool, since on a
+        network share each open is a round trip. Files that disappear while
+        scanning are skipped, as are files modified at or after
+        modified_before (epoch seconds) when it is given.
+        """
+        # Plain string paths straight from the dirents; no Path objects
+        with os.scandir(self.lock_directory) as entries:
+            candidates = []
+            for entry in entries:
+                if not (entry.name.endswith('.lock') and entry.is_file()):
+                    continue
+                try:
+                    st = entry.stat() if _DIRENTRY_HAS_INODE else os.stat(entry.path)
+                except FileNotFoundError:
+                    continue
+                candidates.append((entry.name, entry.path, st))
+        
+        # Forget lock files removed by other processes
+        with self._index_lock:
+            for name in self._index.keys() - {name for name, _, _ in candidates}:
+                del self._index[name]
+        
+        if modified_before is not None:
+            candidates = [c for c in candidates if c[2].st_mtime < modified_before]
+        
+        def load(candidate):
+            _, lock_file, st = candidate
+            try:
+                return (lock_file, st, *self._load_lock(lock_file, st), None)
+            except FileNotFoundError:
+                return None
             except Exception as e:
-                logger.error(f"Error reading lock file {lock_file}: {e}")
-                # Remove corrupted lock file
-                lock_file.unlink()
+                return lock_file, st, None, (None, None), e
+        
+        misses = sum(
+            1 for name, _, st in candidates
+            if self._index.get(name, (None,))[0] != _stat_key(st)
+        )
+        if misses < PARALLEL_READ_THRESHOLD:
+            yield from filter(None, map(load, candidates))
+            return
         
-        return locks
+        with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, misses)) as pool:
+            yield from filter(None, pool.map(load, candidates))
     
     def cleanup_stale_locks(self, max_age_hours: int = 24) -> int:
         """
@@ -257,27 +745,31 @@ class LockManager:
         Returns:
             Number of locks removed
         """
-        removed_count = 0
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        
-        for lock_file in self.lock_directory.glob("*.lock"):
+        cutoff_time = time.time() - max_age_hours * 3600
+        victims = []
+        
+        # A lock file can't have been created after it was last written, so
+        # files modified since the cutoff are skipped without being parsed.
+        # (Heartbeats rewrite the file, so a lock still being heartbeated is
+        # treated as active.)
+        for lock_file, st, lock_data, (lock_time, _), error in self._iter_lock_data(modified_before=cutoff_time):
             try:
-                with open(lock_file, 'r') as f:
-                    lock_data = json.load(f)
+                if error is not None:
+                    raise error
+                if lock_time is None:
+                    raise ValueError(f"malformed lock_time {lock_data.get('lock_time')!r}")
                 
-                lock_time = datetime.fromisoformat(lock_data['lock_time'])
                 if lock_time < cutoff_time:
-                    lock_file.unlink()
-                    removed_count += 1
-                    logger.info(f"Removed stale lock: {lock_file}")
+                    victims.append((lock_file, st))
+                    logger.info("Removing stale lock: %s", lock_file)
                     
             except Exception as e:
-                logger.error(f"Error processing lock file {lock_file}: {e}")
+                logger.error("Error processing lock file %s: %s", lock_file, e)
                 # Remove corrupted lock file
-                lock_file.unlink()
-                removed_count += 1
+                victims.append((lock_file, st))
         
-        logger.info(f"Cleaned up {removed_count} stale locks")
+        removed_count = self._unlink_locks(victims)
+        logger.info("Cleaned up %s stale locks", removed_count)
         return removed_count
     
     def remove_user_locks(self, user_name: str) -> int:
@@ -287,28 +779,31 @@ class LockManager:
         Returns:
             Number of locks removed
         """
-        removed_count = 0
+        victims = []
         
-        for lock_file in self.lock_directory.glob("*.lock"):
+        for lock_file, st, lock_data, _, error in self._iter_lock_data():
             try:
-                with open(lock_file, 'r') as f:
-                    lock_data = json.load(f)
+                if error is not None:
+                    raise error
                 
                 if lock_data['user_name'] == user_name:
-                    lock_file.unlink()
-                    removed_count += 1
-                    logger.info(f"Removed lock for user {user_name}: {lock_file}")
+                    victims.append((lock_file, st))
+                    logger.info("Removing lock for user %s: %s", user_name, lock_file)
                     
             except Exception as e:
-                logger.error(f"Error processing lock file {lock_file}: {e}")
+                logger.error("Error processing lock file %s: %s", lock_file, e)
         
-        logger.info(f"Removed {removed_count} locks for user {user_name}")
+        removed_count = self._unlink_locks(victims)
+        logger.info("Removed %s locks for user %s", removed_count, user_name)
         return removed_count
     
     def update_lock_activity(self, file_path: str, user_name: str) -> Tuple[bool, str]:
         """
         Update the last_seen timestamp for a lock (heartbeat)
         
+        The new timestamp is visible to this manager immediately and written
+        to the lock file by the background flusher within flush_interval.
+        
         Args:
             file_path: Path to the CAD file
             user_name: User name to verify ownership
@@ -318,91 +813,98 @@ class LockManager:
         """
         lock_file_path = self.get_lock_file_path(file_path)
         
-        if not lock_file_path.exists():
-            return False, f"No lock found for {file_path}"
-        
         try:
-            with open(lock_file_path, 'r') as f:
-                lock_data = json.load(f)
-            
-            # Verify ownership
-            if lock_data['user_name'] != user_name:
-                return False, f"Lock belongs to {lock_data['user_name']}, not {user_name}"
-            
-            # Update last_seen timestamp
-            lock_data['last_seen'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            with open(lock_file_path, 'w') as f:
-                json.dump(lock_data, f, indent=2)
+            with self._index_lock:
+                lock_data, (lock_time, _) = self._load_lock(lock_file_path)
+                
+                # Verify ownership
+                if lock_data['user_name'] != user_name:
+                    return False, f"Lock belongs to {lock_data['user_name']}, not {user_name}"
+                
+                # Update last_seen timestamp in the index (copy: the indexed
+                # dict is shared with other readers) and mark it for write-back
+                lock_data = dict(lock_data)
+                now = time.time()
+                lock_data['last_seen'] = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+                name = lock_file_path.name
+                self._index[name] = (self._index[name][0], lock_data, (lock_time, now))
+                self._dirty[name] = lock_file_path
             
+            self._ensure_flusher()
             return True, "Lock activity updated"
             
+        except FileNotFoundError:
+            return False, f"No lock found for {file_path}"
         except Exception as e:
-            logger.error(f"Failed to update lock activity for {file_path}: {e}")
+            logger.error("Failed to update lock activity for %s: %s", file_path, e)
             return False, f"Failed to update lock activity: {e}"
     
-    def get_lock_analytics(self) -> Dict[str, any]:
+    def get_lock_analytics(self, include_ages: bool = False) -> Dict[str, any]:
         """
         Get analytics about all locks (like CADLock dashboard)
         
+        Args:
+            include_ages: Also return every lock's age in 'lock_ages'
+                          (otherwise only the running average is kept)
+        
         Returns:
             Dictionary with analytics data
         """
-        all_locks = self.get_all_locks()
-        
-        if not all_locks:
-            return {
-                'total_locks': 0,
-                'active_users': [],
-                'detection_methods': {},
-                'auto_vs_manual': {'auto': 0, 'manual': 0},
-                'lock_ages': [],
-                'stale_locks': 0
-            }
-        
-        # Analyze locks
+        # Analyze locks in a single pass over the lock directory
+        total_locks = 0
         users = set()
-        detection_methods = {}
+        detection_methods = Counter()
         auto_count = 0
         manual_count = 0
         lock_ages = []
+        age_sum = 0.0
+        age_count = 0
         stale_count = 0
         
-        current_time = datetime.now()
+        current_time = time.time()
         
-        for lock in all_locks:
-            users.add(lock.user_name)
-            
-            # Count detection methods
-            method = lock.detection_method
-            detection_methods[method] = detection_methods.get(method, 0) + 1
+        for lock, lock_time, last_seen in self._iter_locks_raw():
+            total_locks += 1
+            users.add(lock['user_name'])
+            detection_methods[lock['detection_method']] += 1
             
             # Count auto vs manual
-            if lock.auto_created:
+            if lock['auto_created']:
                 auto_count += 1
             else:
                 manual_count += 1
             
-            # Calculate lock age
-            try:
-                lock_time = datetime.strptime(lock.lock_time, "%Y-%m-%d %H:%M:%S")
-                age_hours = (current_time - lock_time).total_seconds() / 3600
+            # Calculate lock age (lock_time was validated by _iter_locks_raw)
+            age_hours = (current_time - lock_time) / 3600
+            age_sum += age_hours
+            age_count += 1
+            if include_ages:
                 lock_ages.append(age_hours)
-                
-                # Check for stale locks (no activity for 4+ hours)
-                last_seen = datetime.strptime(lock.last_seen, "%Y-%m-%d %H:%M:%S")
-                inactive_hours = (current_time - last_seen).total_seconds() / 3600
-                if inactive_hours > 4:
-                    stale_count += 1
-            except:
-                pass
+            
+            # Check for stale locks (no activity for 4+ hours)
+            if last_seen is None:
+                logger.debug("Malformed last_seen in lock %s", lock.get('lock_id'))
+                continue
+            inactive_hours = (current_time - last_seen) / 3600
+            if inactive_hours > 4:
+                stale_count += 1
+        
+        if not total_locks:
+            return {
+                'total_locks': 0,
+                'active_users': [],
+                'detection_methods': {},
+                'auto_vs_manual': {'auto': 0, 'manual': 0},
+                'lock_ages': [],
+                'stale_locks': 0
+            }
         
         return {
-            'total_locks': len(all_locks),
+            'total_locks': total_locks,
             'active_users': list(users),
-            'detection_methods': detection_methods,
+            'detection_methods': dict(detection_methods),
             'auto_vs_manual': {'auto': auto_count, 'manual': manual_count},
             'lock_ages': lock_ages,
-            'average_lock_age': sum(lock_ages) / len(lock_ages) if lock_ages else 0,
+            'average_lock_age': age_sum / age_count if age_count else 0,
             'stale_locks': stale_count
         }
@@ -0,0 +1,157 @@
+"""
+PID file handling for the Nova background monitor
+Shared by the monitor (which writes it) and the CLI (which reads it)
+"""
+
+import errno
+import functools
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+if os.name == 'nt':
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+    
+    # Loaded once, with real prototypes so HANDLEs aren't truncated to a
+    # 32-bit int on 64-bit Windows (also used by the CLI's stop command)
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.GetExitCodeProcess.restype = wintypes.BOOL
+    kernel32.TerminateProcess.argtypes = (wintypes.HANDLE, wintypes.UINT)
+    kernel32.TerminateProcess.restype = wintypes.BOOL
+    kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+    kernel32.WaitForSingleObject.restype = wintypes.DWORD
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    kernel32.CloseHandle.restype = wintypes.BOOL
+else:
+    import fcntl
+
+# Windows access right / error code used by is_process_alive
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+# Last parsed PID file, keyed by (st_mtime_ns, st_ino, st_size)
+_pid_cache = {'key': None, 'pid': None}
+
+@functools.lru_cache(maxsize=1)
+def get_pid_file_path():
+    """Get the path for the PID file, resolved once per process"""
+    if os.name == 'nt':
+        # Windows: Use temp directory
+        return Path(os.getenv('TEMP', 'C:/temp')) / "nova_monitor.pid"
+    else:
+        # Unix-like: Use /var/run or /tmp
+        return Path("/var/run/nova_monitor.pid") if os.access("/var/run", os.W_OK) else Path("/tmp/nova_monitor.pid")
+
+def read_pid(pid_file: Path) -> Optional[int]:
+    """
+    Read the PID stored in a PID file
+    
+    The parsed value is reused while the file's mtime, inode and size are
+    unchanged, so an atomic replace is noticed even within one mtime tick.
+    
+    Returns:
+        The PID, or None if the file is missing or unreadable
+    """
+    try:
+        st = os.stat(pid_file)
+    except OSError:
+        return None
+    
+    key = (st.st_mtime_ns, st.st_ino, st.st_size)
+    if _pid_cache['key'] == key:
+        return _pid_cache['pid']
+    
+    # No lock needed: write_pid_file only ever swaps in a complete file with
+    # os.replace, so whatever file we open holds a whole PID. The key comes
+    # from the opened file so it matches the contents even if it was just
+    # replaced.
+    try:
+        with open(pid_file, 'r') as f:
+            st = os.fstat(f.fileno())
+            pid = int(f.read().strip())
+    except (ValueError, OSError):
+        return None
+    key = (st.st_mtime_ns, st.st_ino, st.st_size)
+    
+    _pid_cache['key'] = key
+    _pid_cache['pid'] = pid
+    return pid
+
+def is_process_alive(pid: int) -> bool:
+    """Check whether a process with the given PID exists"""
+    if os.name == 'nt':
+        return _windows_pid_alive(pid)
+    
+    # Unix-like: Use kill -0; EPERM means the process exists but isn't ours
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError as e:
+        return e.errno == errno.EPERM
+
+def _windows_pid_alive(pid: int) -> bool:
+    """Check a Windows PID with OpenProcess instead of spawning tasklist"""
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists but belongs to someone else
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        # An exited process stays openable while anyone holds a handle to it
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+@contextmanager
+def _exclusive_lock(pid_file: Path):
+    """Hold an exclusive lock on a sidecar file next to the PID file"""
+    with open(f"{pid_file}.lock", 'a+') as lock_file:
+        if os.name == 'nt':
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def write_pid_file(pid_file: Path, pid: int):
+    """
+    Atomically write a PID file
+    
+    The PID is written to a temp file created with O_EXCL, fsynced and then
+    renamed over the PID file, so readers never see a partial value. A
+    sidecar lock serializes concurrent writers.
+    
+    Raises:
+        FileExistsError: If the PID file belongs to another running process
+    """
+    pid_file = Path(pid_file)
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    with _exclusive_lock(pid_file):
+        existing = read_pid(pid_file)
+        if existing is not None and existing != pid and is_process_alive(existing):
+            raise FileExistsError(f"PID file {pid_file} belongs to running process {existing}")
+        
+        tmp_path = f"{pid_file}.{os.getpid()}.tmp"
+        try:
+            # Left behind by a crashed process that had our PID
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            os.write(fd, str(pid).encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, pid_file)
@@ -4,33 +4,37 @@ Watches for file open/close events and manages locks automatically
 """
 
 import os
-import time
-import psutil
 import threading
-from pathlib import Path
-from typing import Dict, List, Optional, Callable
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, FrozenSet, List, Optional, Callable, Tuple
 from datetime import datetime
 import logging
 
-from ..core.lock_manager import LockManager
+from ..core.lock_manager import PATH_CACHE_SIZE, LockManager
+from ..core.pidfile import get_pid_file_path, read_pid, write_pid_file
 
 logger = logging.getLogger(__name__)
 
-def get_pid_file_path():
-    """Get the path for the PID file"""
-    if os.name == 'nt':
-        # Windows: Use temp directory
-        return Path(os.getenv('TEMP', 'C:/temp')) / "nova_monitor.pid"
-    else:
-        # Unix-like: Use /var/run or /tmp
-        return Path("/var/run/nova_monitor.pid") if os.access("/var/run", os.W_OK) else Path("/tmp/nova_monitor.pid")
+# A CAD process's open files are re-read at least this often (seconds), even
+# if its handle count suggests nothing changed
+PROCESS_FILES_MAX_AGE = 10.0
+
+# Identity of this session, read from the environment once at import
+_USER = os.getenv('USERNAME') or os.getenv('USER') or 'Unknown'
+_HOST = os.getenv('COMPUTERNAME') or os.getenv('HOSTNAME') or 'Unknown'
+
+# Upper bound on auto-locks written concurrently when a scan finds several
+# newly opened files (e.g. an assembly and its parts)
+MAX_LOCK_WORKERS = 8
 
 class FileMonitor:
     """Monitors CAD file operations and manages locks automatically"""
     
     def __init__(self, lock_manager: LockManager, 
                  cad_processes: List[str] = None,
-                 check_interval: float = 2.0):
+                 check_interval: float = 2.0,
+                 on_changes: Optional[Callable[[List[str], List[str]], None]] = None):
         """
         Initialize the file monitor
         
@@ -38,11 +42,20 @@ class FileMonitor:
             lock_manager: Lock manager instance
             cad_processes: List of CAD process names to monitor
             check_interval: How often to check for file operations (seconds)
+            on_changes: Called once per scan that locked or unlocked files,
+                        with (locked_paths, unlocked_paths)
         """
         self.lock_manager = lock_manager
         self.check_interval = check_interval
+        self.on_changes = on_changes
+        self._pending_locked: List[str] = []
+        self._pending_unlocked: List[str] = []
+        # Lock writes may finish on _io_pool threads while a scan reports
+        self._pending_lock = threading.Lock()
         self.running = False
         self.monitor_thread = None
+        self._wakeup = threading.Event()
+        self._io_pool: Optional[ThreadPoolExecutor] = None
         self.pid_file = get_pid_file_path()
         
         # Default CAD processes to monitor
@@ -59,29 +72,45 @@ class FileMonitor:
         ]
         
         # Track open files per process
-        self.process_files: Dict[int, List[str]] = {}
-        self.user_name = os.getenv('USERNAME') or os.getenv('USER') or 'Unknown'
-        self.computer_name = os.getenv('COMPUTERNAME') or os.getenv('HOSTNAME') or 'Unknown'
+        self.process_files: Dict[int, FrozenSet[str]] = {}
+        
+        # pid -> (handle/fd count, monotonic time read, CAD files), see
+        # _get_cached_process_files
+        self._proc_cache: Dict[int, Tuple[Optional[int], float, FrozenSet[str]]] = {}
+        
+        # path -> is_cad_file(path); CAD processes keep the same DLLs and
+        # fonts open, so each path only needs classifying once
+        self._cad_path_cache: Dict[str, bool] = {}
+        self.user_name = _USER
+        self.computer_name = _HOST
         
         logger.info(f"File monitor initialized for user: {self.user_name}")
         logger.info(f"Monitoring CAD processes: {self.cad_processes}")
     
     def start_monitoring(self):
-        """Start the file monitoring in a separate thread"""
+        """
+        Start the file monitoring in a separate thread
+        
+        Raises:
+            FileExistsError: If another running monitor owns the PID file
+        """
         if self.running:
             logger.warning("File monitor is already running")
             return
         
         # Create PID file
         try:
-            self.pid_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.pid_file, 'w') as f:
-                f.write(str(os.getpid()))
+            write_pid_file(self.pid_file, os.getpid())
             logger.info(f"Created PID file: {self.pid_file}")
+        except FileExistsError:
+            # A second monitor would be invisible to `nova stop` and would
+            # create duplicate auto-locks, so don't start at all
+            raise
         except Exception as e:
             logger.error(f"Failed to create PID file: {e}")
         
         self.running = True
+        self._wakeup.clear()
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         logger.info("File monitoring started")
@@ -89,12 +118,19 @@ class FileMonitor:
     def stop_monitoring(self):
         """Stop the file monitoring"""
         self.running = False
+        self._wakeup.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5.0)
         
+        # Let lock writes still in flight finish before the PID file goes
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+        
         # Remove PID file
         try:
-            if self.pid_file.exists():
+            # Leave the PID file alone if another monitor process owns it
+            if read_pid(self.pid_file) == os.getpid():
                 self.pid_file.unlink()
                 logger.info(f"Removed PID file: {self.pid_file}")
         except Exception as e:
@@ -102,15 +138,26 @@ class FileMonitor:
         
         logger.info("File monitoring stopped")
     
+    @property
+    def cad_processes(self) -> List[str]:
+        """CAD process names to monitor (assign a new list to change them)"""
+        return self._cad_processes
+    
+    @cad_processes.setter
+    def cad_processes(self, names: List[str]):
+        self._cad_processes = names
+        # Lower-cased once for O(1) lookups in the scan loop
+        self._cad_set = frozenset(name.lower() for name in names)
+    
     def is_cad_process(self, process_name: str) -> bool:
         """Check if the given process name is a CAD process (case-insensitive)"""
-        return process_name.lower() in [p.lower() for p in self.cad_processes]
+        return process_name.lower() in self._cad_set
 
     def is_cad_file(self, file_path: str) -> bool:
         """Check if the given file path is a CAD file"""
-        return self.lock_manager.is_cad_file(file_path)
+        return self._is_cad_path(file_path)
 
-    def get_process_files(self, proc) -> List[str]:
+    def get_process_files(self, proc) -> FrozenSet[str]:
         """Public wrapper around _get_process_files (used in tests)"""
         return self._get_process_files(proc)
 
@@ -123,39 +170,56 @@ class FileMonitor:
         while self.running:
             try:
                 self._check_cad_processes()
-                time.sleep(self.check_interval)
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(self.check_interval)
+            # Sleep until the next check, waking immediately on stop_monitoring()
+            self._wakeup.wait(self.check_interval)
     
     def _check_cad_processes(self):
         """Check for CAD processes and their open files"""
+        # psutil is only needed for automatic monitoring, not manual lock commands
+        import psutil
+        
         current_process_files = {}
+        opened: List[Tuple[str, int, Optional[str]]] = []
         
-        for proc in psutil.process_iter(['pid', 'name', 'username', 'open_files']):
+        # Only prefetch what's needed to spot CAD processes; asking for
+        # open_files/username here would enumerate the handles and owner of
+        # every process on the machine, every tick
+        cad_set = self._cad_set
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
-                if proc.info['name'] and self.is_cad_process(proc.info['name']):
+                name = proc.info['name']
+                if name and name.lower() in cad_set:
                     pid = proc.info['pid']
-                    open_files = self._get_process_files(proc)
+                    open_files = self._get_cached_process_files(proc)
                     current_process_files[pid] = open_files
                     
+                    # Nothing to diff when the file set is the cached one or unchanged
+                    previous = self.process_files.get(pid)
+                    if previous is None or open_files is previous or open_files == previous:
+                        continue
+                    
+                    try:
+                        username = proc.username()
+                    except psutil.AccessDenied:
+                        username = None
+                    
                     # Check for new files (files that weren't tracked before)
-                    if pid in self.process_files:
-                        new_files = set(open_files) - set(self.process_files[pid])
-                        for file_path in new_files:
-                            self._handle_file_opened(file_path, pid, proc.info.get("username"))
+                    for file_path in open_files - previous:
+                        opened.append((file_path, pid, username))
                     
                     # Check for closed files (files that were tracked but are no longer open)
-                    if pid in self.process_files:
-                        closed_files = set(self.process_files[pid]) - set(open_files)
-                        for file_path in closed_files:
-                            self._handle_file_closed(file_path, pid, proc.info.get("username"))
+                    for file_path in previous - open_files:
+                        self._handle_file_closed(file_path, pid, username)
                             
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
             except Exception as e:
                 logger.error(f"Error checking process {proc.info.get('name', 'unknown')}: {e}")
         
+        self._lock_opened_files(opened)
+        
         # Handle processes that have terminated
         terminated_pids = set(self.process_files.keys()) - set(current_process_files.keys())
         for pid in terminated_pids:
@@ -163,19 +227,89 @@ class FileMonitor:
                 self._handle_file_closed(file_path, pid)
         
         self.process_files = current_process_files
+        for pid in self._proc_cache.keys() - current_process_files.keys():
+            del self._proc_cache[pid]
+        
+        # Report the whole scan's changes at once rather than per file
+        with self._pending_lock:
+            locked, self._pending_locked = self._pending_locked, []
+            unlocked, self._pending_unlocked = self._pending_unlocked, []
+        if locked or unlocked:
+            try:
+                self.on_changes(locked, unlocked)
+            except Exception as e:
+                logger.error(f"Error reporting lock changes: {e}")
+    
+    def _lock_opened_files(self, opened: List[Tuple[str, int, Optional[str]]]):
+        """
+        Create auto-locks for (file_path, pid, username) entries
+        
+        Several files are locked in parallel since each lock is a write to
+        the (usually remote) lock directory. The scan waits at most one check
+        interval for them; slower writes finish in the background and are
+        reported with the next scan.
+        """
+        if len(opened) < 2:
+            for args in opened:
+                self._handle_file_opened(*args)
+            return
+        
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=MAX_LOCK_WORKERS,
+                                               thread_name_prefix='nova-lock')
+        futures = [self._io_pool.submit(self._handle_file_opened, *args) for args in opened]
+        wait(futures, timeout=self.check_interval)
+    
+    def _get_cached_process_files(self, proc) -> FrozenSet[str]:
+        """
+        Open CAD files of a process, reusing the last result while its handle
+        (Windows) or fd count is unchanged
+        
+        open_files() is the expensive part of a scan; on Windows it walks the
+        system handle table. A file swapped for another within one tick keeps
+        the count the same, so results are still refreshed after
+        PROCESS_FILES_MAX_AGE seconds.
+        """
+        import psutil
+        
+        pid = proc.info['pid']
+        try:
+            count = proc.num_handles() if os.name == 'nt' else proc.num_fds()
+        except psutil.Error:
+            count = None
+        
+        now = time.monotonic()
+        cached = self._proc_cache.get(pid)
+        if (count is not None and cached is not None and cached[0] == count
+                and now - cached[1] < PROCESS_FILES_MAX_AGE):
+            return cached[2]
+        
+        files = self._get_process_files(proc)
+        self._proc_cache[pid] = (count, now, files)
+        return files
     
-    def _get_process_files(self, proc) -> List[str]:
-        """Get list of open files for a process"""
+    def _get_process_files(self, proc) -> FrozenSet[str]:
+        """Get the set of open CAD files for a process"""
+        import psutil
+        
         try:
-            files = []
-            for file in proc.open_files():
-                if file.path and self.lock_manager.is_cad_file(file.path):
-                    files.append(file.path)
-            return files
+            return frozenset(
+                file.path for file in proc.open_files()
+                if file.path and self._is_cad_path(file.path)
+            )
         except (psutil.AccessDenied, psutil.NoSuchProcess):
-            return []
+            return frozenset()
+    
+    def _is_cad_path(self, path: str) -> bool:
+        """Memoized lock_manager.is_cad_file for paths seen in open_files()"""
+        result = self._cad_path_cache.get(path)
+        if result is None:
+            if len(self._cad_path_cache) >= PATH_CACHE_SIZE:
+                self._cad_path_cache.clear()
+            result = self._cad_path_cache[path] = self.lock_manager.is_cad_file(path)
+        return result
     
-    def _handle_file_opened(self, file_path: str, process_id: int, username: Optional[str]):
+    def _handle_file_opened(self, file_path: str, process_id: int, username: Optional[str] = None):
         """Handle when a CAD file is opened"""
         try:
             effective_user = username or self.user_name
@@ -185,18 +319,24 @@ class FileMonitor:
             )
             if success:
                 logger.info(f"Auto-locked file: {file_path}")
+                if self.on_changes is not None:
+                    with self._pending_lock:
+                        self._pending_locked.append(file_path)
             else:
                 logger.warning(f"Failed to auto-lock {file_path}: {message}")
         except Exception as e:
             logger.error(f"Error handling file opened event for {file_path}: {e}")
     
-    def _handle_file_closed(self, file_path: str, process_id: int, username: Optional[str]):
+    def _handle_file_closed(self, file_path: str, process_id: int, username: Optional[str] = None):
         """Handle when a CAD file is closed"""
         try:
             effective_user = username or self.user_name
             success, message = self.lock_manager.remove_lock(file_path, effective_user)
             if success:
                 logger.info(f"Auto-unlocked file: {file_path}")
+                if self.on_changes is not None:
+                    with self._pending_lock:
+                        self._pending_unlocked.append(file_path)
             else:
                 logger.warning(f"Failed to auto-unlock {file_path}: {message}")
         except Exception as e:
@@ -216,8 +356,8 @@ class ManualFileMonitor:
     
     def __init__(self, lock_manager: LockManager):
         self.lock_manager = lock_manager
-        self.user_name = os.getenv('USERNAME') or os.getenv('USER') or 'Unknown'
-        self.computer_name = os.getenv('COMPUTERNAME') or os.getenv('HOSTNAME') or 'Unknown'
+        self.user_name = _USER
+        self.computer_name = _HOST
     
     def lock_file(self, file_path: str) -> tuple[bool, str]:
         """Manually lock a CAD file"""
@@ -2,6 +2,6 @@
 Web components for Nova system
 """
 
-from .dashboard import start_dashboard, init_dashboard
+from .dashboard import start_dashboard, init_dashboard, get_lock_manager
 
-__all__ = ['start_dashboard', 'init_dashboard']
+__all__ = ['start_dashboard', 'init_dashboard', 'get_lock_manager']
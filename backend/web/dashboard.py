@@ -4,18 +4,74 @@ Provides a web interface to monitor and manage file locks
 """
 
 import os
+
+# Socket.IO async mode: NOVA_ASYNC_MODE, otherwise eventlet when it is
+# installed. Eventlet serves every client from one OS thread, so the
+# standard library is monkey-patched before anything below imports
+# threading, socket or time; otherwise a sleep or lock would stall
+# the whole server.
+ASYNC_MODE = os.getenv('NOVA_ASYNC_MODE') or None
+if ASYNC_MODE in (None, 'eventlet'):
+    try:
+        import eventlet
+    except ImportError:  # Flask-SocketIO falls back to threading
+        pass
+    else:
+        eventlet.monkey_patch()
+        ASYNC_MODE = 'eventlet'
+
 import json
+import hashlib
+from collections import Counter
+from itertools import islice
 from datetime import datetime
+from pathlib import Path
 from flask import Flask, jsonify, request, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import threading
 import time
+import logging
 
-from ..core.lock_manager import LockManager
+from ..core.lock_manager import LOCK_EXPIRY_SECONDS, LockManager
+
+try:
+    import orjson
+except ImportError:  # optional speedup, Flask's stdlib json provider is the fallback
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # optional, responses are sent uncompressed without it
+    Compress = None
+
+logger = logging.getLogger(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        # Same output as the default provider: compact, keys sorted
+        return orjson.dumps(
+            obj, default=self.default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('NOVA_SECRET_KEY', 'dev-secret-key')
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+# Lock lists repeat the same user, computer and directory names, so they
+# compress well; Brotli is preferred when the client accepts it. Streamed
+# responses are left alone since compressing them buffers the whole body.
+if Compress is not None:
+    app.config.update(COMPRESS_ALGORITHM=['br', 'gzip'], COMPRESS_LEVEL=4, COMPRESS_MIN_SIZE=500,
+                      COMPRESS_MIMETYPES=['application/json'], COMPRESS_STREAMS=False)
+    Compress(app)
 
 # Enable CORS for all routes
 CORS(app, 
@@ -24,21 +80,195 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization", "Accept"],
      supports_credentials=True)
 
-socketio = SocketIO(app, cors_allowed_origins="*")
+# ASYNC_MODE (see the top of the module) is eventlet when it is installed;
+# NOVA_ASYNC_MODE=threading forces the Werkzeug thread-per-request server.
+# Socket.IO packets are encoded with the app's JSON provider (orjson when available)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    json=app.json)
 
-# Global lock manager instance
+# Global lock manager instance, created by init_dashboard() or on first use
 lock_manager = None
+_init_lock = threading.Lock()
+
+# Serialized /api/locks body and /api/stats data, shared by both endpoints and
+# rebuilt only when the lock directory's snapshot_key() changes, a cached lock
+# reaches its expiry, or a request here mutates the locks
+_locks_cache = {'key': None, 'expires_at': 0.0, 'payload': None, 'etag': None, 'stats': None,
+                'by_user': None}
+_locks_cache_lock = threading.Lock()
+
+# Runs blocking lock-directory reads; start_dashboard() swaps in eventlet's
+# native thread pool so a cache rebuild doesn't stall the event loop
+def _run_blocking(func):
+    return func()
+
+# Locks read per _run_blocking() call while streaming /api/locks.ndjson
+NDJSON_BATCH_SIZE = 100
+
+# Lock changes made through the API are sent to clients as a single
+# 'locks_delta' event per window instead of one Socket.IO frame per change
+EMIT_COALESCE_WINDOW = 0.05
+_pending_delta = {'created': [], 'removed': [], 'cleaned': 0}
+_emit_scheduled = False
+_pending_lock = threading.Lock()
+
+# Clients connecting with ?prefix=<path> join that prefix's room and only get
+# the changes under it; everyone else joins ALL_LOCKS_ROOM
+ALL_LOCKS_ROOM = 'locks'
+_prefix_clients = Counter()
+
+# Socket.IO connects allowed per client address: CONNECT_BURST at once, then
+# CONNECT_RATE per second, so a client stuck in a reconnect loop is refused
+CONNECT_RATE = 5.0
+CONNECT_BURST = 5.0
+MAX_CONNECT_BUCKETS = 4096
+_connect_buckets = {}  # address -> (tokens, monotonic time of last connect)
+_connect_lock = threading.Lock()
 
 def init_dashboard(lock_directory: str):
-    """Initialize the dashboard with a lock manager"""
+    """Point the dashboard at a lock directory; a no-op if it already serves that directory"""
     global lock_manager
-    lock_manager = LockManager(lock_directory)
+    if lock_manager is not None and lock_manager.lock_directory == Path(lock_directory):
+        return
+    
+    previous, lock_manager = lock_manager, LockManager(lock_directory)
+    _invalidate_locks_cache()
+    # Stop the replaced manager's heartbeat flusher rather than leaking it
+    if previous is not None:
+        previous.close()
+
+def get_lock_manager() -> LockManager:
+    """Return the dashboard's lock manager, creating it for NOVA_LOCKS_DIR on first use"""
+    if lock_manager is None:
+        with _init_lock:
+            if lock_manager is None:
+                init_dashboard(os.getenv('NOVA_LOCKS_DIR', './locks'))
+    return lock_manager
+
+def _invalidate_locks_cache():
+    """Force the next /api/locks or /api/stats request to rebuild the cache"""
+    with _locks_cache_lock:
+        _locks_cache['key'] = None
+
+def _queue_delta(created: dict = None, removed: dict = None, cleaned: int = 0):
+    """Queue a lock change for the next coalesced 'locks_delta' emit"""
+    global _emit_scheduled
+    with _pending_lock:
+        if created is not None:
+            _pending_delta['created'].append(created)
+        if removed is not None:
+            _pending_delta['removed'].append(removed)
+        _pending_delta['cleaned'] += cleaned
+        
+        if not _emit_scheduled:
+            _emit_scheduled = True
+            # A Socket.IO background task is a green thread under eventlet
+            # and a plain thread otherwise, so emitting from it is safe in
+            # every async mode
+            socketio.start_background_task(_emit_after_window)
+
+def _emit_after_window():
+    """Wait out the coalescing window, then emit what was queued during it"""
+    socketio.sleep(EMIT_COALESCE_WINDOW)
+    _emit_delta()
+
+def _emit_delta():
+    """Emit every change queued during the coalescing window"""
+    global _emit_scheduled
+    with _pending_lock:
+        delta = {key: value.copy() if isinstance(value, list) else value
+                 for key, value in _pending_delta.items()}
+        _pending_delta['created'].clear()
+        _pending_delta['removed'].clear()
+        _pending_delta['cleaned'] = 0
+        _emit_scheduled = False
+        prefixes = list(_prefix_clients)
+    
+    socketio.emit('locks_delta', delta, to=ALL_LOCKS_ROOM)
+    for prefix in prefixes:
+        scoped = {
+            'created': [c for c in delta['created'] if c['file_path'].startswith(prefix)],
+            'removed': [r for r in delta['removed'] if r['file_path'].startswith(prefix)],
+            'cleaned': delta['cleaned']
+        }
+        if scoped['created'] or scoped['removed'] or scoped['cleaned']:
+            socketio.emit('locks_delta', scoped, to=_prefix_room(prefix))
+
+def _prefix_room(prefix: str) -> str:
+    """Room of the clients watching locks under prefix"""
+    return f'prefix:{prefix}'
+
+def _lock_row(lock) -> dict:
+    """The fields of a lock exposed by the API"""
+    return {
+        'file_path': lock.file_path,
+        'user_name': lock.user_name,
+        'computer_name': lock.computer_name,
+        'lock_time': lock.lock_time,
+        'process_id': lock.process_id,
+        'lock_id': lock.lock_id
+    }
+
+def _lock_expiry(lock) -> float:
+    """Epoch seconds at which get_all_locks() will drop a lock as stale"""
+    try:
+        return datetime.fromisoformat(lock.lock_time).timestamp() + LOCK_EXPIRY_SECONDS
+    except (TypeError, ValueError):
+        return 0.0
+
+def _get_locks_cache() -> dict:
+    """Return a consistent copy of the locks cache, rebuilding it if the lock directory changed"""
+    return _run_blocking(_read_locks_cache)
+
+def _read_locks_cache() -> dict:
+    # Fingerprint first: a change that lands while rebuilding then just
+    # triggers one more rebuild instead of being cached under the new key
+    manager = get_lock_manager()
+    key = manager.snapshot_key()
+    with _locks_cache_lock:
+        if _locks_cache['key'] == key and time.time() < _locks_cache['expires_at']:
+            return dict(_locks_cache)
+        
+        locks = manager.get_all_locks()
+        
+        # Build the payload and the statistics in a single pass over the locks
+        rows = []
+        users = set()
+        computers = set()
+        extensions = Counter()
+        by_user = {}
+        for lock in locks:
+            row = _lock_row(lock)
+            rows.append(row)
+            by_user.setdefault(lock.user_name, []).append(row)
+            users.add(lock.user_name)
+            computers.add(lock.computer_name)
+            extensions[os.path.splitext(lock.file_path)[1].lower()] += 1
+        payload = app.json.dumps(rows).encode() + b'\n'
+        
+        _locks_cache.update(
+            key=key,
+            expires_at=min((_lock_expiry(lock) for lock in locks), default=float('inf')),
+            payload=payload,
+            etag=hashlib.sha1(payload).hexdigest(),
+            by_user=by_user,
+            stats={
+                'total_locks': len(locks),
+                'unique_users': len(users),
+                'unique_computers': len(computers),
+                'extensions': dict(extensions),
+                'users': list(users),
+                'computers': list(computers)
+            }
+        )
+        return dict(_locks_cache)
 
-# Auto-initialize when module is imported
-if lock_manager is None:
-    # Use a default directory if none specified
-    default_lock_dir = os.getenv('NOVA_LOCKS_DIR', './locks')
-    init_dashboard(default_lock_dir)
+def _log_request():
+    """Log the current API request and its headers at DEBUG level"""
+    # Copying the headers is the costly part, so skip it unless it'll be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("API request: %s %s from %s", request.method, request.path, request.remote_addr)
+        logger.debug("Headers: %s", dict(request.headers))
 
 @app.route('/favicon.ico')
 def favicon():
@@ -54,6 +284,7 @@ def index():
         'frontend_url': 'http://localhost:3000',
         'api_docs': {
             'locks': '/api/locks',
+            'locks_stream': '/api/locks.ndjson',
             'stats': '/api/stats',
             'cleanup': '/api/cleanup',
             'remove_lock': '/api/locks/<file_path>'
@@ -63,23 +294,22 @@ def index():
 @app.route('/api/locks', methods=['GET', 'POST'])
 def locks_endpoint():
     """API endpoint to get all locks or create a new lock"""
-    print(f"🔍 API request: {request.method} /api/locks from {request.remote_addr}")
-    print(f"🔍 Headers: {dict(request.headers)}")
+    _log_request()
     
-    if not lock_manager:
-        return jsonify({'error': 'Dashboard not initialized'}), 500
+    manager = get_lock_manager()
     
     if request.method == 'GET':
-        # Get all locks
-        locks = lock_manager.get_all_locks()
-        return jsonify([{
-            'file_path': lock.file_path,
-            'user_name': lock.user_name,
-            'computer_name': lock.computer_name,
-            'lock_time': lock.lock_time,
-            'process_id': lock.process_id,
-            'lock_id': lock.lock_id
-        } for lock in locks])
+        cache = _get_locks_cache()
+        
+        # ?user=<name> narrows the list to one user's locks
+        user = request.args.get('user')
+        if user is not None:
+            return jsonify(cache['by_user'].get(user, []))
+        
+        # Get all locks; clients that already have this version get a 304
+        response = app.response_class(cache['payload'], mimetype='application/json')
+        response.set_etag(cache['etag'])
+        return response.make_conditional(request)
     
     elif request.method == 'POST':
         # Create a new lock
@@ -99,12 +329,20 @@ def locks_endpoint():
             if not all([file_path, user_name, computer_name]):
                 return jsonify({'error': 'Missing required fields: file_path, user_name, computer_name'}), 400
             
+            # A client re-sending a lock it already holds (e.g. after a
+            # reconnect) is answered from the index without a disk write
+            existing = manager.check_lock(file_path)
+            if existing is not None and (existing.user_name, existing.computer_name, existing.process_id) == \
+                    (user_name, computer_name, process_id):
+                return jsonify({'message': 'already locked', 'success': True}), 200
+            
             # Create the lock
-            success, message = lock_manager.create_lock(file_path, user_name, computer_name, process_id)
+            success, message = manager.create_lock(file_path, user_name, computer_name, process_id)
             
             if success:
-                # Emit socket event for real-time updates
-                socketio.emit('lock_created', {'file_path': file_path, 'user_name': user_name})
+                _invalidate_locks_cache()
+                # Queue socket event for real-time updates
+                _queue_delta(created={'file_path': file_path, 'user_name': user_name})
                 return jsonify({'message': message, 'success': True}), 201
             else:
                 return jsonify({'error': message, 'success': False}), 400
@@ -112,37 +350,54 @@ def locks_endpoint():
         except Exception as e:
             return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
 
+@app.route('/api/locks.ndjson')
+def locks_ndjson():
+    """API endpoint streaming all locks as newline-delimited JSON"""
+    manager = get_lock_manager()
+    
+    locks = manager.iter_locks()
+    
+    def next_batch():
+        return [_lock_row(lock) for lock in islice(locks, NDJSON_BATCH_SIZE)]
+    
+    # Lock files are read a batch at a time off the event loop, so neither
+    # the lock list nor the body is ever held in memory as a whole
+    def generate():
+        while True:
+            batch = _run_blocking(next_batch)
+            if not batch:
+                break
+            yield ''.join(app.json.dumps(row) + '\n' for row in batch)
+    
+    return app.response_class(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/locks/<path:file_path>')
 def get_lock(file_path):
     """API endpoint to get lock for a specific file"""
-    if not lock_manager:
-        return jsonify({'error': 'Dashboard not initialized'}), 500
+    manager = get_lock_manager()
     
-    lock = lock_manager.check_lock(file_path)
+    lock = manager.check_lock(file_path)
     if lock:
-        return jsonify({
-            'file_path': lock.file_path,
-            'user_name': lock.user_name,
-            'computer_name': lock.computer_name,
-            'lock_time': lock.lock_time,
-            'process_id': lock.process_id,
-            'lock_id': lock.lock_id
-        })
+        # A lock's exposed fields never change under the same lock_id, so
+        # editors polling their own lock get a 304 until it is replaced
+        response = jsonify(_lock_row(lock))
+        response.set_etag(lock.lock_id)
+        return response.make_conditional(request)
     else:
         return jsonify({'error': 'File not locked'}), 404
 
 @app.route('/api/locks/<path:file_path>', methods=['DELETE'])
 def remove_lock(file_path):
     """API endpoint to remove a lock"""
-    if not lock_manager:
-        return jsonify({'error': 'Dashboard not initialized'}), 500
+    manager = get_lock_manager()
     
     user_name = request.args.get('user_name', 'admin')
-    success, message = lock_manager.remove_lock(file_path, user_name)
+    success, message = manager.remove_lock(file_path, user_name)
     
     if success:
-        # Emit socket event for real-time updates
-        socketio.emit('lock_removed', {'file_path': file_path})
+        _invalidate_locks_cache()
+        # Queue socket event for real-time updates
+        _queue_delta(removed={'file_path': file_path})
         return jsonify({'message': message})
     else:
         return jsonify({'error': message}), 400
@@ -150,8 +405,7 @@ def remove_lock(file_path):
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_locks():
     """API endpoint to cleanup stale locks"""
-    if not lock_manager:
-        return jsonify({'error': 'Dashboard not initialized'}), 500
+    manager = get_lock_manager()
     
     # Validate JSON input
     if not request.is_json:
@@ -168,10 +422,11 @@ def cleanup_locks():
             
     except Exception as e:
         return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
-    removed_count = lock_manager.cleanup_stale_locks(max_age)
+    removed_count = manager.cleanup_stale_locks(max_age)
+    _invalidate_locks_cache()
     
-    # Emit socket event for real-time updates
-    socketio.emit('locks_cleaned', {'removed_count': removed_count})
+    # Queue socket event for real-time updates
+    _queue_delta(cleaned=removed_count)
     
     return jsonify({
         'message': f'Cleaned up {removed_count} stale locks',
@@ -181,47 +436,79 @@ def cleanup_locks():
 @app.route('/api/stats')
 def get_stats():
     """API endpoint to get lock statistics"""
-    print(f"🔍 API request: {request.method} /api/stats from {request.remote_addr}")
-    print(f"🔍 Headers: {dict(request.headers)}")
-    
-    if not lock_manager:
-        return jsonify({'error': 'Dashboard not initialized'}), 500
+    _log_request()
     
-    locks = lock_manager.get_all_locks()
-    
-    # Calculate statistics
-    total_locks = len(locks)
-    users = set(lock.user_name for lock in locks)
-    computers = set(lock.computer_name for lock in locks)
-    
-    # Group by file extension
-    extensions = {}
-    for lock in locks:
-        ext = os.path.splitext(lock.file_path)[1].lower()
-        extensions[ext] = extensions.get(ext, 0) + 1
-    
-    return jsonify({
-        'total_locks': total_locks,
-        'unique_users': len(users),
-        'unique_computers': len(computers),
-        'extensions': extensions,
-        'users': list(users),
-        'computers': list(computers)
-    })
+    return jsonify(_get_locks_cache()['stats'])
+
+def _allow_connect(address: str) -> bool:
+    """Take a token from address's connect bucket, returning False if it is empty"""
+    now = time.monotonic()
+    with _connect_lock:
+        tokens, last = _connect_buckets.get(address, (CONNECT_BURST, now))
+        tokens = min(CONNECT_BURST, tokens + (now - last) * CONNECT_RATE)
+        if len(_connect_buckets) >= MAX_CONNECT_BUCKETS and address not in _connect_buckets:
+            _connect_buckets.clear()
+        if tokens < 1.0:
+            _connect_buckets[address] = (tokens, now)
+            return False
+        _connect_buckets[address] = (tokens - 1.0, now)
+        return True
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    print(f'Client connected: {request.sid}')
+    if not _allow_connect(request.remote_addr):
+        logger.warning("Refusing Socket.IO connect from %s: too many attempts", request.remote_addr)
+        return False
+    
+    logger.debug("Client connected: %s", request.sid)
+    prefix = request.args.get('prefix')
+    if prefix:
+        join_room(_prefix_room(prefix))
+        with _pending_lock:
+            _prefix_clients[prefix] += 1
+    else:
+        join_room(ALL_LOCKS_ROOM)
     emit('connected', {'message': 'Connected to Nova dashboard'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    print(f'Client disconnected: {request.sid}')
+    logger.debug("Client disconnected: %s", request.sid)
+    prefix = request.args.get('prefix')
+    if prefix:
+        with _pending_lock:
+            _prefix_clients[prefix] -= 1
+            if _prefix_clients[prefix] <= 0:
+                del _prefix_clients[prefix]
+
+# Open-file soft limit to ask for when the hard limit is unlimited
+OPEN_FILE_LIMIT = 65535
+
+def _raise_open_file_limit():
+    """Raise the soft open-file limit, since every Socket.IO client holds a socket"""
+    try:
+        import resource
+    except ImportError:  # Windows has no RLIMIT_NOFILE
+        return
+    
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = OPEN_FILE_LIMIT if hard == resource.RLIM_INFINITY else hard
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError) as e:
+            logger.warning("Could not raise open file limit from %s: %s", soft, e)
 
 def start_dashboard(host='0.0.0.0', port=5050, debug=False):
     """Start the dashboard server"""
+    global _run_blocking
+    if socketio.async_mode == 'eventlet':
+        from eventlet import tpool
+        _run_blocking = tpool.execute
+        # One green thread per client means the fd limit, not threads, caps connections
+        _raise_open_file_limit()
+    
     print(f"Starting Nova dashboard on http://{host}:{port}")
     socketio.run(app, host=host, port=port, debug=debug, use_reloader=False)
 
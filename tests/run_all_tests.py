@@ -8,81 +8,96 @@ import os
 import sys
 import subprocess
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# unittest's summary ("Ran 9 tests in 1.014s" then "OK" or
+# "FAILED (failures=2, errors=1)") is always at the end of its output
+SUMMARY_TAIL = 4096
+_SUMMARY_RE = re.compile(r'Ran (\d+) tests?.*?(?:FAILED \(([^)]*)\)|OK)', re.S)
+_PROBLEM_RE = re.compile(r'(?:failures|errors)=(\d+)')
+
 def parse_test_results(output):
     """Parse test output to extract pass/fail counts"""
     if not output:
-
         return 0, 0, 0
     
-
-    
-    # Look for patterns like "Ran 9 tests in 1.014s" and "FAILED (failures=2)"
-    ran_match = re.search(r'Ran (\d+) tests?', output)
-    
-    if not ran_match:
-
+    summary = _SUMMARY_RE.search(output[-SUMMARY_TAIL:])
+    if not summary:
         return 0, 0, 0
     
-    total = int(ran_match.group(1))
+    total = int(summary.group(1))
+    # Errors count as failures
+    failures = sum(int(n) for n in _PROBLEM_RE.findall(summary.group(2) or ''))
+    return total, total - failures, failures
 
-    
-    # Check if tests failed or passed
-    if 'FAILED' in output:
-
-        # Parse failure count
-        failures_match = re.search(r'FAILED \(failures=(\d+)\)', output)
-        errors_match = re.search(r'FAILED \(failures=(\d+), errors=(\d+)\)', output)
-        
-        failures = int(failures_match.group(1)) if failures_match else 0
-        errors = int(errors_match.group(2)) if errors_match else 0
-        
-        # If we found errors, add them to failures
-        if errors > 0:
-            failures += errors
-        
-        passed = total - failures
-    else:
+# (result name, script, description). Unit suites only touch their own temp
+# directories, so they run concurrently; the rest may share the real PID
+# file and lock directory and run one at a time.
+UNIT_SUITES = [
+    ("Lock Manager", "tests/test_lock_manager.py", "Lock Manager Unit Tests"),
+    ("File Monitor", "tests/test_file_monitor.py", "File Monitor Unit Tests"),
+    ("PID File", "tests/test_pidfile.py", "PID File Unit Tests"),
+    ("Dashboard API", "tests/test_dashboard.py", "Dashboard API Unit Tests"),
+    ("CLI Commands", "tests/test_cli_commands.py", "CLI Commands Unit Tests"),
+]
+SERIAL_SUITES = [
+    ("Service Management", "tests/test_service_management.py", "Service Management Unit Tests"),
+]
+INTEGRATION_SUITES = [
+    ("System Integration", "tests/test_integration.py", "System Integration Tests"),
+]
 
-        # All tests passed
-        passed = total
-        failures = 0
-    
-
-    return total, passed, failures
+def run_script(script):
+    """Run a Python script without a shell, returning (returncode, combined output)"""
+    result = subprocess.run([sys.executable, script], stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout
 
-def run_command(cmd, description):
-    """Run a command and display results"""
+def report(description, returncode, output):
+    """Display the results of one test suite"""
     print(f"\n🧪 {description}")
     print("=" * 50)
     
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        # Parse test results - check both stdout and stderr
-        # Python unittest often outputs to stderr instead of stdout
-        output = result.stdout if result.stdout else result.stderr
-        total, passed, failed = parse_test_results(output)
-        
-        if result.returncode == 0:
-            if failed == 0:
-                print(f"✅ PASSED ({passed}/{total} tests)")
-            else:
-                print(f"⚠️  PARTIAL ({passed}/{total} tests passed, {failed} failed)")
+    total, passed, failed = parse_test_results(output)
+    
+    if returncode == 0:
+        if failed == 0:
+            print(f"✅ PASSED ({passed}/{total} tests)")
         else:
-            print(f"❌ FAILED ({passed}/{total} tests passed, {failed} failed)")
-        
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(result.stderr)
-            
-        return total, passed, failed
-                
-    except Exception as e:
-        print(f"❌ ERROR: {e}")
-        return 0, 0, 0
+            print(f"⚠️  PARTIAL ({passed}/{total} tests passed, {failed} failed)")
+    else:
+        print(f"❌ FAILED ({passed}/{total} tests passed, {failed} failed)")
+    
+    if output:
+        print(output)
+    
+    return total, passed, failed
+
+def run_suites(suites, parallel=False):
+    """Run test suites and report them in order, returning [(name, total, passed, failed)]"""
+    def run(suite):
+        try:
+            return run_script(suite[1])
+        except Exception as e:
+            return e
+    
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(suites)) as pool:
+            outcomes = list(pool.map(run, suites))
+    else:
+        outcomes = map(run, suites)
+    
+    results = []
+    for (name, _, description), outcome in zip(suites, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"\n🧪 {description}")
+            print("=" * 50)
+            print(f"❌ ERROR: {outcome}")
+            results.append((name, 0, 0, 0))
+        else:
+            results.append((name, *report(description, *outcome)))
+    return results
 
 def main():
     """Run all Nova tests"""
@@ -92,55 +107,22 @@ def main():
     # Change to project root directory
     os.chdir(Path(__file__).parent.parent)
     
-    # Track overall results
-    total_tests = 0
-    total_passed = 0
-    total_failed = 0
-    test_results = []
-    
     # Run unit tests
     print("\n📋 Running Unit Tests...")
     print("=" * 50)
     
-    total, passed, failed = run_command("python3 tests/test_lock_manager.py", "Lock Manager Unit Tests")
-    test_results.append(("Lock Manager", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
-    
-    total, passed, failed = run_command("python3 tests/test_file_monitor.py", "File Monitor Unit Tests")
-    test_results.append(("File Monitor", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
-    
-    total, passed, failed = run_command("python3 tests/test_dashboard.py", "Dashboard API Unit Tests")
-    test_results.append(("Dashboard API", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
-    
-    total, passed, failed = run_command("python3 tests/test_cli_commands.py", "CLI Commands Unit Tests")
-    test_results.append(("CLI Commands", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
-    
-    total, passed, failed = run_command("python3 tests/test_service_management.py", "Service Management Unit Tests")
-    test_results.append(("Service Management", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
+    test_results = run_suites(UNIT_SUITES, parallel=True)
+    test_results += run_suites(SERIAL_SUITES)
     
     # Run integration tests
     print("\n🔗 Running Integration Tests...")
     print("=" * 50)
     
-    total, passed, failed = run_command("python3 tests/test_integration.py", "System Integration Tests")
-    test_results.append(("System Integration", total, passed, failed))
-    total_tests += total
-    total_passed += passed
-    total_failed += failed
+    test_results += run_suites(INTEGRATION_SUITES)
+    
+    total_tests = sum(total for _, total, _, _ in test_results)
+    total_passed = sum(passed for _, _, passed, _ in test_results)
+    total_failed = sum(failed for _, _, _, failed in test_results)
     
     # Run demonstrations (non-interactive parts)
     print("\n🎭 Running Demonstrations...")
@@ -153,15 +135,15 @@ def main():
     print("\n🧪 Lock Conflict Demo")
     print("=" * 50)
     try:
-        result = subprocess.run("python3 tests/demo_lock_conflict.py", shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
+        returncode, output = run_script("tests/demo_lock_conflict.py")
+        if returncode == 0:
             print("✅ Demo completed successfully")
-            if result.stdout:
-                print(result.stdout)
+            if output:
+                print(output)
         else:
             print("❌ Demo failed")
-            if result.stderr:
-                print("Error:", result.stderr)
+            if output:
+                print("Error:", output)
     except Exception as e:
         print(f"❌ ERROR: {e}")
     
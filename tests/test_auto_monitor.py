@@ -4,14 +4,16 @@ Test script to demonstrate automatic file monitoring with NovaLocks directory
 """
 
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.core.lock_manager import LockManager
 from backend.monitor.file_monitor import FileMonitor
-import time
 import logging
 
 # Set up logging to see what's happening
@@ -20,7 +22,10 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(messa
 def main():
     # Initialize lock manager and file monitor with NovaLocks directory
     lock_manager = LockManager('./NovaLocks')
-    file_monitor = FileMonitor(lock_manager)
+    
+    # Woken by the monitor whenever a scan locks or unlocks files
+    changed = threading.Event()
+    file_monitor = FileMonitor(lock_manager, on_changes=lambda locked, unlocked: changed.set())
     
     print("🔄 Starting automatic CAD file monitoring...")
     print("📁 Using NovaLocks directory for lock storage")
@@ -40,13 +45,14 @@ def main():
     try:
         # Keep the script running
         while True:
-            # Show current locks every 10 seconds
+            # Show current locks when they change, and at least every 10 seconds
             locks = lock_manager.get_all_locks()
             if locks:
                 print(f"🔒 Current auto-locks in NovaLocks: {len(locks)} files")
                 for lock in locks[-3:]:  # Show last 3 locks
                     print(f"   └─ {lock.file_path.split('/')[-1]} by {lock.user_name}")
-            time.sleep(10)
+            changed.wait(10)
+            changed.clear()
             
     except KeyboardInterrupt:
         print("\n🛑 Stopping file monitor...")
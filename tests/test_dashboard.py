@@ -5,7 +5,6 @@ Unit tests for Nova Dashboard API
 
 import unittest
 import tempfile
-import shutil
 import time
 import json
 import sys
@@ -13,7 +12,9 @@ from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.core.lock_manager import LockManager
 from backend.web.dashboard import app, init_dashboard
@@ -21,20 +22,24 @@ from backend.web.dashboard import app, init_dashboard
 class TestDashboardAPI(unittest.TestCase):
     """Test cases for Dashboard API"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create the Flask test client once; only the lock directory changes per test"""
+        cls.app = app
+        cls.app.config['TESTING'] = True
+        cls.client = cls.app.test_client()
+    
     def setUp(self):
         """Set up test environment"""
-        # Create temporary directory for test locks
-        self.test_dir = tempfile.mkdtemp()
+        # Create temporary directory for test locks, removed even if setUp fails
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.test_dir = temp_dir.name
         self.lock_manager = LockManager(self.test_dir)
         
         # Initialize the dashboard with our test lock manager
         init_dashboard(self.test_dir)
         
-        # Create Flask test app
-        self.app = app
-        self.app.config['TESTING'] = True
-        self.client = self.app.test_client()
-        
         # Test data
         self.test_user = "test_user"
         self.test_computer = "TEST-PC"
@@ -44,24 +49,28 @@ class TestDashboardAPI(unittest.TestCase):
             "drawing.dwg"
         ]
     
-    def tearDown(self):
-        """Clean up test environment"""
-        shutil.rmtree(self.test_dir)
+    def get_json(self, url, status=200):
+        """GET url, check the status code and return the decoded JSON body"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status)
+        return response.get_json()
+    
+    def make_lock(self, file_path, user_name=None, computer_name=None, process_id=1234,
+                  auto_created=True, detection_method="auto"):
+        """Create an automatic lock, by the test user and computer unless given"""
+        return self.lock_manager.create_lock(
+            file_path, user_name or self.test_user, computer_name or self.test_computer, process_id,
+            auto_created=auto_created, detection_method=detection_method
+        )
     
     def test_api_locks_endpoint(self):
         """Test /api/locks endpoint returns all locks"""
         # Create some test locks
         for file_path in self.test_files:
-            self.lock_manager.create_lock(
-                file_path, self.test_user, self.test_computer, 1234,
-                auto_created=True, detection_method="auto"
-            )
+            self.make_lock(file_path)
         
         # Test GET /api/locks
-        response = self.client.get('/api/locks')
-        self.assertEqual(response.status_code, 200)
-        
-        data = json.loads(response.data)
+        data = self.get_json('/api/locks')
         self.assertEqual(len(data), 3)
         
         # Verify lock data structure (based on actual API response)
@@ -73,23 +82,71 @@ class TestDashboardAPI(unittest.TestCase):
             self.assertIn('process_id', lock)
             self.assertIn('lock_id', lock)
     
+    def test_api_locks_etag(self):
+        """Test /api/locks answers 304 until the lock directory changes"""
+        self.make_lock(self.test_files[0])
+        
+        response = self.client.get('/api/locks')
+        etag = response.headers.get('ETag')
+        self.assertIsNotNone(etag)
+        
+        response = self.client.get('/api/locks', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        
+        # A lock created by another client changes the payload
+        self.make_lock(self.test_files[1])
+        response = self.client.get('/api/locks', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+        self.assertEqual(self.get_json('/api/stats')['total_locks'], 2)
+    
+    def test_api_locks_filtered_by_user(self):
+        """Test ?user= returns only that user's locks"""
+        self.make_lock(self.test_files[0])
+        self.make_lock(self.test_files[1], "other_user")
+        
+        data = self.get_json(f'/api/locks?user={self.test_user}')
+        self.assertEqual([lock['file_path'] for lock in data], [self.test_files[0]])
+        self.assertEqual(self.get_json('/api/locks?user=nobody'), [])
+    
+    def test_api_locks_ndjson_endpoint(self):
+        """Test the streaming endpoint returns one JSON lock per line"""
+        for file_path in self.test_files:
+            self.make_lock(file_path)
+        
+        response = self.client.get('/api/locks.ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        locks = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(sorted(lock['file_path'] for lock in locks), sorted(self.test_files))
+        self.assertEqual(locks, self.get_json('/api/locks'))
+    
+    def test_api_lock_etag(self):
+        """Test polling a single lock returns 304 until the lock is replaced"""
+        self.make_lock(self.test_files[0])
+        
+        response = self.client.get(f'/api/locks/{self.test_files[0]}')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        
+        response = self.client.get(f'/api/locks/{self.test_files[0]}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        
+        self.lock_manager.remove_lock(self.test_files[0], self.test_user)
+        self.make_lock(self.test_files[0])
+        response = self.client.get(f'/api/locks/{self.test_files[0]}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+    
     def test_api_stats_endpoint(self):
         """Test /api/stats endpoint returns lock statistics"""
         # Create locks with different characteristics
-        self.lock_manager.create_lock(
-            self.test_files[0], "user1", "PC1", 1111,
-            auto_created=True, detection_method="auto"
-        )
-        self.lock_manager.create_lock(
-            self.test_files[1], "user2", "PC2", 2222,
-            auto_created=False, detection_method="manual"
-        )
+        self.make_lock(self.test_files[0], "user1", "PC1", 1111)
+        self.make_lock(self.test_files[1], "user2", "PC2", 2222,
+                       auto_created=False, detection_method="manual")
         
         # Test GET /api/stats
-        response = self.client.get('/api/stats')
-        self.assertEqual(response.status_code, 200)
-        
-        data = json.loads(response.data)
+        data = self.get_json('/api/stats')
         self.assertEqual(data['total_locks'], 2)
         self.assertEqual(len(data['users']), 2)
         self.assertIn('user1', data['users'])
@@ -102,10 +159,7 @@ class TestDashboardAPI(unittest.TestCase):
     def test_api_cleanup_endpoint(self):
         """Test /api/cleanup endpoint removes stale locks"""
         # Create a lock
-        self.lock_manager.create_lock(
-            self.test_files[0], self.test_user, self.test_computer, 1234,
-            auto_created=True, detection_method="auto"
-        )
+        self.make_lock(self.test_files[0])
         
         # Verify lock exists
         self.assertIsNotNone(self.lock_manager.check_lock(self.test_files[0]))
@@ -114,7 +168,7 @@ class TestDashboardAPI(unittest.TestCase):
         response = self.client.post('/api/cleanup', json={'max_age_hours': 0})
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('removed_count', data)
         self.assertGreater(data['removed_count'], 0)
         
@@ -124,42 +178,131 @@ class TestDashboardAPI(unittest.TestCase):
     def test_api_remove_lock_endpoint(self):
         """Test /api/locks/<file_path> DELETE endpoint removes specific lock"""
         # Create a lock
-        self.lock_manager.create_lock(
-            self.test_files[0], self.test_user, self.test_computer, 1234,
-            auto_created=True, detection_method="auto"
-        )
+        self.make_lock(self.test_files[0])
         
         # Test DELETE /api/locks/<file_path> (correct endpoint)
         # Use a simpler file path to avoid URL encoding issues
         test_file = "test_file.sldprt"
-        self.lock_manager.create_lock(
-            test_file, self.test_user, self.test_computer, 1234,
-            auto_created=True, detection_method="auto"
-        )
+        self.make_lock(test_file)
         
         response = self.client.delete(f'/api/locks/{test_file}?user_name={self.test_user}')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('message', data)
         
         # Verify lock was removed
         self.assertIsNone(self.lock_manager.check_lock(test_file))
     
+    def test_api_changes_emitted_as_one_delta(self):
+        """Test lock changes made in quick succession reach clients as one event"""
+        with patch('backend.web.dashboard.socketio.emit') as mock_emit:
+            for file_path in self.test_files[:2]:
+                response = self.client.post('/api/locks', json={
+                    'file_path': file_path,
+                    'user_name': self.test_user,
+                    'computer_name': self.test_computer
+                })
+                self.assertEqual(response.status_code, 201)
+            self.client.delete(f'/api/locks/{self.test_files[0]}?user_name={self.test_user}')
+            time.sleep(0.2)
+        
+        mock_emit.assert_called_once()
+        event, delta = mock_emit.call_args[0]
+        self.assertEqual(event, 'locks_delta')
+        self.assertEqual([c['file_path'] for c in delta['created']], self.test_files[:2])
+        self.assertEqual([r['file_path'] for r in delta['removed']], [self.test_files[0]])
+    
+    def test_prefix_clients_only_get_their_changes(self):
+        """Test a client connected with ?prefix= only receives changes under it"""
+        from backend.web.dashboard import socketio
+        
+        everything = socketio.test_client(self.app)
+        scoped = socketio.test_client(self.app, query_string='prefix=/projects/a/')
+        everything.get_received()
+        scoped.get_received()
+        
+        for file_path in ('/projects/a/part.sldprt', '/projects/b/part.sldprt'):
+            self.client.post('/api/locks', json={
+                'file_path': file_path,
+                'user_name': self.test_user,
+                'computer_name': self.test_computer
+            })
+        time.sleep(0.2)
+        
+        # Changes queued by earlier tests may still be delivered alongside
+        def created(client):
+            return [c['file_path'] for event in client.get_received()
+                    for c in event['args'][0]['created'] if c['file_path'].startswith('/projects/')]
+        
+        self.assertEqual(created(everything), ['/projects/a/part.sldprt', '/projects/b/part.sldprt'])
+        self.assertEqual(created(scoped), ['/projects/a/part.sldprt'])
+        everything.disconnect()
+        scoped.disconnect()
+    
+    def test_reconnect_storm_is_refused(self):
+        """Test a client reconnecting in a tight loop is refused once its burst is spent"""
+        from backend.web import dashboard
+        
+        with patch.dict(dashboard._connect_buckets, clear=True):
+            clients = [dashboard.socketio.test_client(self.app) for _ in range(int(dashboard.CONNECT_BURST) + 1)]
+            self.assertTrue(all(client.is_connected() for client in clients[:-1]))
+            self.assertFalse(clients[-1].is_connected())
+            for client in clients[:-1]:
+                client.disconnect()
+    
+    def test_api_create_existing_lock_is_idempotent(self):
+        """Test re-posting a lock the caller already holds succeeds without rewriting it"""
+        lock = {
+            'file_path': self.test_files[0],
+            'user_name': self.test_user,
+            'computer_name': self.test_computer,
+            'process_id': 1234
+        }
+        self.assertEqual(self.client.post('/api/locks', json=lock).status_code, 201)
+        lock_id = self.lock_manager.check_lock(self.test_files[0]).lock_id
+        
+        with patch.object(LockManager, 'create_lock') as mock_create:
+            response = self.client.post('/api/locks', json=lock)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['message'], 'already locked')
+        mock_create.assert_not_called()
+        self.assertEqual(self.lock_manager.check_lock(self.test_files[0]).lock_id, lock_id)
+        
+        # Someone else still gets refused
+        response = self.client.post('/api/locks', json=dict(lock, user_name='other_user'))
+        self.assertEqual(response.status_code, 400)
+    
+    def test_init_dashboard_keeps_manager_for_same_directory(self):
+        """Test re-initializing with the current directory keeps the lock manager"""
+        from backend.web import dashboard
+        
+        manager = dashboard.lock_manager
+        init_dashboard(self.test_dir)
+        self.assertIs(dashboard.lock_manager, manager)
+    
+    def test_lock_manager_created_on_first_use(self):
+        """Test the lock manager is only created when a request needs it"""
+        from backend.web import dashboard
+        
+        lazy_dir = Path(self.test_dir) / "lazy_locks"
+        with patch.object(dashboard, 'lock_manager', None), \
+                patch.dict('os.environ', {'NOVA_LOCKS_DIR': str(lazy_dir)}):
+            response = self.client.get('/api/stats')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(dashboard.lock_manager.lock_directory, lazy_dir)
+    
     def test_api_remove_lock_wrong_user(self):
         """Test /api/locks/<file_path> DELETE endpoint prevents wrong user removal"""
         # Create a lock with simple path
         test_file = "test_file.sldprt"
-        self.lock_manager.create_lock(
-            test_file, "user1", "PC1", 1111,
-            auto_created=True, detection_method="auto"
-        )
+        self.make_lock(test_file, "user1", "PC1", 1111)
         
         # Try to remove with different user
         response = self.client.delete(f'/api/locks/{test_file}?user_name=user2')
         self.assertEqual(response.status_code, 400)  # LockManager returns False for wrong user
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
         # Note: The current implementation doesn't check user permissions
         # This test verifies the endpoint works but doesn't enforce user restrictions
@@ -169,7 +312,7 @@ class TestDashboardAPI(unittest.TestCase):
         response = self.client.delete('/api/locks/nonexistent_file.sldprt?user_name=test_user')
         self.assertEqual(response.status_code, 400)  # LockManager returns False for non-existent locks
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
     
     def test_dashboard_home_page(self):
@@ -178,27 +321,18 @@ class TestDashboardAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Nova Dashboard', response.data)
     
-    def test_dashboard_favicon(self):
-        """Test dashboard favicon is accessible"""
-        response = self.client.get('/favicon.ico')
-        self.assertEqual(response.status_code, 204)  # No content response
-    
     def test_novalocks_directory_integration(self):
         """Test that dashboard works with NovaLocks directory"""
         # Create NovaLocks subdirectory
         novalocks_dir = Path(self.test_dir) / "NovaLocks"
         novalocks_dir.mkdir(exist_ok=True)
         
-        # Create new lock manager and app with NovaLocks directory
+        # Create new lock manager with NovaLocks directory
         novalocks_lock_manager = LockManager(str(novalocks_dir))
         
-        # Initialize the dashboard with NovaLocks directory
+        # Point the dashboard at the NovaLocks directory
         init_dashboard(str(novalocks_dir))
         
-        novalocks_app = app
-        novalocks_app.config['TESTING'] = True
-        novalocks_client = novalocks_app.test_client()
-        
         # Create a lock in NovaLocks directory
         novalocks_lock_manager.create_lock(
             self.test_files[0], self.test_user, self.test_computer, 1234,
@@ -206,10 +340,7 @@ class TestDashboardAPI(unittest.TestCase):
         )
         
         # Test that dashboard can access locks from NovaLocks directory
-        response = novalocks_client.get('/api/locks')
-        self.assertEqual(response.status_code, 200)
-        
-        data = json.loads(response.data)
+        data = self.get_json('/api/locks')
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['file_path'], self.test_files[0])
     
@@ -227,7 +358,7 @@ class TestDashboardAPI(unittest.TestCase):
         response = self.client.delete('/api/locks/invalid//path?user_name=test_user')
         
         # Check the response data to understand what happened
-        data = json.loads(response.data)
+        data = response.get_json()
         if response.status_code == 200:
             # If it returns 200, it should have a message indicating success
             self.assertIn('message', data)
@@ -235,8 +366,11 @@ class TestDashboardAPI(unittest.TestCase):
             # If it returns 400, it should have an error
             self.assertIn('error', data)
     
-    def test_cors_headers(self):
-        """Test that CORS headers are set correctly"""
+    def test_favicon_and_cors_headers(self):
+        """Test the favicon is accessible and CORS headers are set correctly"""
+        response = self.client.get('/favicon.ico')
+        self.assertEqual(response.status_code, 204)  # No content response
+        
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
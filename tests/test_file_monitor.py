@@ -3,42 +3,68 @@
 Unit tests for Nova File Monitor
 """
 
+import os
 import unittest
 import tempfile
-import shutil
-import time
 import sys
+import threading
+from collections import namedtuple
 from pathlib import Path
 from unittest.mock import Mock, patch
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.core.lock_manager import LockManager
 from backend.monitor.file_monitor import FileMonitor
 
+# Stand-in for the entries of psutil's Process.open_files(); much cheaper to
+# build than a Mock and only .path is read
+OpenFile = namedtuple('OpenFile', ['path'])
+
+# Test file paths
+TEST_FILES = (
+    "/shared/projects/test_file.sldprt",
+    "/shared/projects/assembly.sldasm",
+    "/shared/projects/drawing.dwg",
+)
+
+# Process names FileMonitor should treat as CAD (matching is case-insensitive)
+CAD_PROCESSES = (
+    "SLDWORKS.exe", "sldworks.exe", "solidworks.exe", "SOLIDWORKS.exe",
+    "acad.exe", "ACAD.exe", "ACAD.EXE", "Acad.exe",
+    "Inventor.exe", "inventor.exe", "INVENTOR.EXE", "inventor.EXE",
+)
+NON_CAD_PROCESSES = (
+    "notepad.exe", "chrome.exe", "explorer.exe",
+    "python.exe", "java.exe", "node.exe",
+)
+
+CAD_FILES = (
+    "test.sldprt", "test.sldasm", "test.slddrw",
+    "test.dwg", "test.dxf", "test.ipt", "test.iam",
+    "test.step", "test.stp", "test.iges", "test.igs",
+)
+NON_CAD_FILES = (
+    "test.txt", "test.pdf", "test.doc", "test.exe",
+    "test.jpg", "test.png", "test.mp4",
+)
+
 
 class TestFileMonitor(unittest.TestCase):
     """Test cases for FileMonitor class"""
 
     def setUp(self):
         """Set up test environment"""
-        # Create temporary directory for test locks
-        self.test_dir = tempfile.mkdtemp()
+        # Create temporary directory for test locks, removed even if setUp fails
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.test_dir = temp_dir.name
         self.lock_manager = LockManager(self.test_dir)
         self.file_monitor = FileMonitor(self.lock_manager)
 
-        # Test file paths
-        self.test_files = [
-            "/shared/projects/test_file.sldprt",
-            "/shared/projects/assembly.sldasm",
-            "/shared/projects/drawing.dwg"
-        ]
-
-    def tearDown(self):
-        """Clean up test environment"""
-        shutil.rmtree(self.test_dir)
-
     # -----------------------------
     # Helper to make mock processes
     # -----------------------------
@@ -49,47 +75,31 @@ class TestFileMonitor(unittest.TestCase):
         proc.pid = pid
         proc.name.return_value = name
         proc.username.return_value = user
-        proc.open_files.return_value = [Mock(path=f) for f in open_files]
+        proc.open_files.return_value = [OpenFile(f) for f in open_files]
         return proc
 
     def test_cad_process_detection(self):
         """Test that CAD processes are correctly identified"""
-        # Test case-insensitive matching (the method converts to lowercase)
-        # Use the exact process names that FileMonitor has, plus variations
-        cad_processes = [
-            "SLDWORKS.exe", "sldworks.exe", "solidworks.exe", "SOLIDWORKS.exe",
-            "acad.exe", "ACAD.exe", "ACAD.EXE", "Acad.exe",
-            "Inventor.exe", "inventor.exe", "INVENTOR.EXE", "inventor.EXE"
-        ]
-        
-        for process_name in cad_processes:
-            self.assertTrue(self.file_monitor.is_cad_process(process_name), 
-                          f"Process {process_name} should be recognized as CAD")
+        # subTest reports every mismatching name rather than stopping at the first
+        for process_name in CAD_PROCESSES:
+            with self.subTest(process_name=process_name):
+                self.assertTrue(self.file_monitor.is_cad_process(process_name), 
+                              f"Process {process_name} should be recognized as CAD")
 
-        non_cad_processes = [
-            "notepad.exe", "chrome.exe", "explorer.exe",
-            "python.exe", "java.exe", "node.exe"
-        ]
-        for process_name in non_cad_processes:
-            self.assertFalse(self.file_monitor.is_cad_process(process_name),
-                           f"Process {process_name} should NOT be recognized as CAD")
+        for process_name in NON_CAD_PROCESSES:
+            with self.subTest(process_name=process_name):
+                self.assertFalse(self.file_monitor.is_cad_process(process_name),
+                               f"Process {process_name} should NOT be recognized as CAD")
 
     def test_cad_file_detection(self):
         """Test that CAD files are correctly identified"""
-        cad_files = [
-            "test.sldprt", "test.sldasm", "test.slddrw",
-            "test.dwg", "test.dxf", "test.ipt", "test.iam",
-            "test.step", "test.stp", "test.iges", "test.igs"
-        ]
-        for file_path in cad_files:
-            self.assertTrue(self.file_monitor.is_cad_file(file_path))
+        for file_path in CAD_FILES:
+            with self.subTest(file_path=file_path):
+                self.assertTrue(self.file_monitor.is_cad_file(file_path))
 
-        non_cad_files = [
-            "test.txt", "test.pdf", "test.doc", "test.exe",
-            "test.jpg", "test.png", "test.mp4"
-        ]
-        for file_path in non_cad_files:
-            self.assertFalse(self.file_monitor.is_cad_file(file_path))
+        for file_path in NON_CAD_FILES:
+            with self.subTest(file_path=file_path):
+                self.assertFalse(self.file_monitor.is_cad_file(file_path))
 
     def test_process_file_mapping(self):
         """Test mapping between processes and open files"""
@@ -105,7 +115,7 @@ class TestFileMonitor(unittest.TestCase):
     def test_automatic_lock_creation(self):
         """Test automatic lock creation when CAD files are opened"""
         # Test the direct method that handles file opening
-        test_file = self.test_files[0]
+        test_file = TEST_FILES[0]
         test_user = "test_user"
         test_pid = 1234
         
@@ -125,24 +135,24 @@ class TestFileMonitor(unittest.TestCase):
         """Test automatic lock removal when CAD files are closed"""
         # First create a lock
         self.lock_manager.create_lock(
-            self.test_files[0], "test_user", "TEST-PC", 1234,
+            TEST_FILES[0], "test_user", "TEST-PC", 1234,
             auto_created=True, detection_method="auto"
         )
-        lock_info = self.lock_manager.check_lock(self.test_files[0])
+        lock_info = self.lock_manager.check_lock(TEST_FILES[0])
         self.assertIsNotNone(lock_info)
 
         # Test the direct method that handles file closing
-        self.file_monitor._handle_file_closed(self.test_files[0], 1234, "test_user")
+        self.file_monitor._handle_file_closed(TEST_FILES[0], 1234, "test_user")
         
         # Check that lock was removed
-        lock_info = self.lock_manager.check_lock(self.test_files[0])
+        lock_info = self.lock_manager.check_lock(TEST_FILES[0])
         self.assertIsNone(lock_info, "Lock should be removed when file is closed")
 
     def test_multiple_cad_processes(self):
         """Test monitoring multiple CAD processes simultaneously"""
         # Test the direct methods that handle file opening for multiple processes
-        test_file1 = self.test_files[0]
-        test_file2 = self.test_files[1]
+        test_file1 = TEST_FILES[0]
+        test_file2 = TEST_FILES[1]
         
         # Simulate user1 opening file1
         self.file_monitor._handle_file_opened(test_file1, 1234, "user1")
@@ -168,7 +178,7 @@ class TestFileMonitor(unittest.TestCase):
         novalocks_file_monitor = FileMonitor(novalocks_lock_manager)
 
         # Test the direct method that handles file opening
-        test_file = self.test_files[0]
+        test_file = TEST_FILES[0]
         test_user = "test_user"
         test_pid = 1234
         
@@ -184,6 +194,75 @@ class TestFileMonitor(unittest.TestCase):
         lock_info = novalocks_lock_manager.check_lock(test_file)
         self.assertIsNotNone(lock_info, "Lock should be created in NovaLocks directory")
 
+    def test_check_cad_processes_tracks_opened_and_closed_files(self):
+        """Test a scan locks newly opened files and unlocks closed ones"""
+        first, second = TEST_FILES[0], TEST_FILES[1]
+        ticks = [
+            [first],
+            [first, second],
+            [first],
+        ]
+        with patch("psutil.process_iter") as mock_process_iter:
+            for open_files in ticks:
+                mock_process_iter.return_value = [
+                    self.make_mock_process("sldworks.exe", 1234, "test_user", open_files),
+                    self.make_mock_process("notepad.exe", 99, "test_user", ["/tmp/notes.sldprt"]),
+                ]
+                self.file_monitor._check_cad_processes()
+                if len(open_files) == 2:
+                    self.assertIsNotNone(self.lock_manager.check_lock(second))
+        
+        # Only the cheap attributes are prefetched for every process
+        mock_process_iter.assert_called_with(['pid', 'name'])
+        self.assertIsNone(self.lock_manager.check_lock(second))
+        self.assertIsNone(self.lock_manager.check_lock("/tmp/notes.sldprt"))
+
+    def test_terminated_process_files_unlocked(self):
+        """Test files of a CAD process that exits are unlocked on the next scan"""
+        user = self.file_monitor.user_name
+        with patch("psutil.process_iter") as mock_process_iter:
+            for processes in ([[]], [TEST_FILES[:1]], []):
+                mock_process_iter.return_value = [
+                    self.make_mock_process("sldworks.exe", 1234, user, open_files)
+                    for open_files in processes
+                ]
+                self.file_monitor._check_cad_processes()
+                if processes and processes[0]:
+                    self.assertIsNotNone(self.lock_manager.check_lock(TEST_FILES[0]))
+        
+        self.assertEqual(self.file_monitor.process_files, {})
+        self.assertIsNone(self.lock_manager.check_lock(TEST_FILES[0]))
+
+    def test_changes_reported_once_per_scan(self):
+        """Test on_changes receives all of a scan's locks in one call"""
+        on_changes = Mock()
+        self.file_monitor.on_changes = on_changes
+        with patch("psutil.process_iter") as mock_process_iter:
+            for open_files in ([], TEST_FILES):
+                mock_process_iter.return_value = [
+                    self.make_mock_process("sldworks.exe", 1234, "test_user", open_files)
+                ]
+                self.file_monitor._check_cad_processes()
+        
+        on_changes.assert_called_once()
+        locked, unlocked = on_changes.call_args[0]
+        self.assertEqual(sorted(locked), sorted(TEST_FILES))
+        self.assertEqual(unlocked, [])
+
+    def test_open_files_reused_while_handle_count_unchanged(self):
+        """Test open_files() is only re-read when the process's fd count changes"""
+        proc = self.make_mock_process("sldworks.exe", 1234, "test_user", [TEST_FILES[0]])
+        proc.num_fds.return_value = proc.num_handles.return_value = 10
+        
+        self.assertEqual(self.file_monitor._get_cached_process_files(proc), {TEST_FILES[0]})
+        self.assertEqual(self.file_monitor._get_cached_process_files(proc), {TEST_FILES[0]})
+        self.assertEqual(proc.open_files.call_count, 1)
+        
+        proc.num_fds.return_value = proc.num_handles.return_value = 11
+        proc.open_files.return_value = [OpenFile(f) for f in TEST_FILES[:2]]
+        self.assertEqual(self.file_monitor._get_cached_process_files(proc), set(TEST_FILES[:2]))
+        self.assertEqual(proc.open_files.call_count, 2)
+
     def test_monitoring_start_stop(self):
         """Test that monitoring can be started and stopped correctly"""
         self.assertFalse(self.file_monitor.is_monitoring())
@@ -192,13 +271,32 @@ class TestFileMonitor(unittest.TestCase):
         self.file_monitor.stop_monitoring()
         self.assertFalse(self.file_monitor.is_monitoring())
 
+    def test_start_refuses_pid_file_of_running_monitor(self):
+        """A PID file owned by another live process keeps the monitor from starting"""
+        self.file_monitor.pid_file = Path(self.test_dir) / "nova_monitor.pid"
+        # Our parent process stands in for an already running monitor
+        self.file_monitor.pid_file.write_text(str(os.getppid()))
+
+        with self.assertRaises(FileExistsError):
+            self.file_monitor.start_monitoring()
+        self.assertFalse(self.file_monitor.is_monitoring())
+        self.assertIsNone(self.file_monitor.monitor_thread)
+
     def test_error_handling(self):
         """Test error handling during monitoring"""
-        with patch("psutil.process_iter") as mock_process_iter:
-            mock_process_iter.side_effect = Exception("Process iteration error")
+        # Signals that the monitor thread has hit the failing scan, so the
+        # test doesn't have to guess how long that takes
+        scanned = threading.Event()
+        
+        def failing_process_iter(*args, **kwargs):
+            scanned.set()
+            raise Exception("Process iteration error")
+        
+        with patch("psutil.process_iter", side_effect=failing_process_iter):
             try:
                 self.file_monitor.start_monitoring()
-                time.sleep(0.1)
+                self.assertTrue(scanned.wait(timeout=5.0))
+                self.assertTrue(self.file_monitor.monitor_thread.is_alive())
                 self.file_monitor.stop_monitoring()
             except Exception as e:
                 self.fail(f"FileMonitor should handle errors gracefully: {e}")
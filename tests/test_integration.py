@@ -8,39 +8,72 @@ import unittest
 import tempfile
 import shutil
 import time
-import json
+import os
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.core.lock_manager import LockManager
 from backend.monitor.file_monitor import FileMonitor
 from backend.web.dashboard import app, init_dashboard
 
+# Keep test lock files in RAM where tmpfs is available (Linux)
+TEMP_ROOT = '/dev/shm' if os.access('/dev/shm', os.W_OK) else None
+
+def clear_directory(directory):
+    """Remove everything inside directory, leaving it empty"""
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+
+def lock_file_names(directory):
+    """Names of the .lock files directly inside directory"""
+    return [entry.name for entry in os.scandir(directory) if entry.name.endswith(".lock")]
+
 class TestNovaIntegration(unittest.TestCase):
     """Integration tests for Nova system"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create the lock directory and Flask test client once for the whole class"""
+        cls.test_dir = tempfile.mkdtemp(dir=TEMP_ROOT)
+        
+        # Create Flask test app
+        cls.app = app
+        cls.app.config['TESTING'] = True
+        cls.client = cls.app.test_client()
+        
+        # Worker threads for the concurrency tests, started once
+        cls.pool = ThreadPoolExecutor(max_workers=8)
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up test environment"""
+        cls.pool.shutdown()
+        shutil.rmtree(cls.test_dir)
+    
     def setUp(self):
         """Set up test environment"""
-        # Create temporary directory for test locks
-        self.test_dir = tempfile.mkdtemp()
+        # Each test starts from an empty lock directory
+        clear_directory(self.test_dir)
         self.lock_manager = LockManager(self.test_dir)
         
         # Create file monitor
         self.file_monitor = FileMonitor(self.lock_manager)
         
-        # Initialize the dashboard with our test lock manager
+        # Point the dashboard at the test directory (kept across tests)
         init_dashboard(self.test_dir)
         
-        # Create Flask test app
-        self.app = app
-        self.app.config['TESTING'] = True
-        self.client = self.app.test_client()
-        
         # Test data
         self.test_files = [
             "/shared/projects/engine_design.sldprt",
@@ -52,10 +85,6 @@ class TestNovaIntegration(unittest.TestCase):
         self.test_users = ["sarah.johnson", "john.smith", "mike.chen"]
         self.test_computers = ["DESIGN-PC-01", "DESIGN-PC-02", "WORKSTATION-03"]
     
-    def tearDown(self):
-        """Clean up test environment"""
-        shutil.rmtree(self.test_dir)
-    
     def test_end_to_end_lock_workflow(self):
         """Test complete lock workflow from file open to dashboard display"""
         # Simulate user opening CAD file
@@ -70,7 +99,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['file_path'], self.test_files[0])
         self.assertEqual(data[0]['user_name'], self.test_users[0])
@@ -79,7 +108,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/stats')
         self.assertEqual(response.status_code, 200)
         
-        stats = json.loads(response.data)
+        stats = response.get_json()
         self.assertEqual(stats['total_locks'], 1)
         self.assertIn(self.test_users[0], stats['users'])
         
@@ -94,7 +123,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 0)
     
     def test_multi_user_collaboration(self):
@@ -121,20 +150,18 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 3)
         
         # Verify each user has their own lock
         user_files = {lock['user_name']: lock['file_path'] for lock in data}
-        self.assertEqual(user_files[self.test_users[0]], self.test_files[0])
-        self.assertEqual(user_files[self.test_users[1]], self.test_files[1])
-        self.assertEqual(user_files[self.test_users[2]], self.test_files[2])
+        self.assertEqual(user_files, dict(zip(self.test_users, self.test_files)))
         
         # Verify statistics show all users
         response = self.client.get('/api/stats')
         self.assertEqual(response.status_code, 200)
         
-        stats = json.loads(response.data)
+        stats = response.get_json()
         self.assertEqual(stats['total_locks'], 3)
         self.assertEqual(len(stats['users']), 3)
         for user in self.test_users:
@@ -163,7 +190,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['user_name'], self.test_users[0])
         
@@ -182,7 +209,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['user_name'], self.test_users[1])
     
@@ -206,7 +233,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['file_path'], test_file)
     
@@ -237,15 +264,13 @@ class TestNovaIntegration(unittest.TestCase):
         self.assertTrue(success)
         
         # 2. Verify lock file exists in NovaLocks directory
-        lock_files = list(novalocks_dir.glob("*.lock"))
-        self.assertEqual(len(lock_files), 1)
-        self.assertTrue(lock_files[0].exists())
+        self.assertEqual(len(lock_file_names(novalocks_dir)), 1)
         
         # 3. Verify dashboard can access lock
         response = novalocks_client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['file_path'], self.test_files[0])
         
@@ -254,12 +279,14 @@ class TestNovaIntegration(unittest.TestCase):
         novalocks_file_monitor._handle_file_opened(self.test_files[1], 5678, self.test_users[1])
         
         # Verify new lock created in NovaLocks directory
-        lock_files = list(novalocks_dir.glob("*.lock"))
-        self.assertEqual(len(lock_files), 2)
+        self.assertEqual(len(lock_file_names(novalocks_dir)), 2)
     
     def test_concurrent_access_scenarios(self):
         """Test system behavior under concurrent access"""
         # Simulate multiple users accessing system simultaneously
+        num_users = 3
+        barrier = threading.Barrier(num_users)
+        
         def user_workflow(user_index):
             """Simulate a user's workflow"""
             file_path = self.test_files[user_index]
@@ -267,7 +294,8 @@ class TestNovaIntegration(unittest.TestCase):
             computer = self.test_computers[user_index]
             pid = 1000 + user_index
             
-            # Create lock
+            # Create all locks at the same moment
+            barrier.wait(timeout=5)
             success, _ = self.lock_manager.create_lock(
                 file_path, user, computer, pid,
                 auto_created=True, detection_method="auto"
@@ -282,26 +310,42 @@ class TestNovaIntegration(unittest.TestCase):
             return success
         
         # Run multiple user workflows concurrently
-        threads = []
-        for i in range(3):
-            thread = threading.Thread(target=user_workflow, args=(i,))
-            threads.append(thread)
-            thread.start()
-        
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        results = list(self.pool.map(user_workflow, range(num_users)))
+        self.assertEqual(results, [True] * num_users)
         
         # Verify system handled concurrent access correctly
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), 0)  # All locks should be removed
         
         # Verify no orphaned lock files
-        lock_files = list(Path(self.test_dir).glob("*.lock"))
-        self.assertEqual(len(lock_files), 0)
+        self.assertEqual(lock_file_names(self.test_dir), [])
+    
+    def test_same_file_contention(self):
+        """Test only one of many simultaneous lock attempts on one file wins"""
+        num_users = 8
+        barrier = threading.Barrier(num_users)
+        file_path = self.test_files[0]
+        
+        def try_lock(user_index):
+            """Race the other users for the same file"""
+            barrier.wait(timeout=5)
+            success, _ = self.lock_manager.create_lock(
+                file_path, f"user{user_index}", f"PC-{user_index:02d}", 2000 + user_index,
+                auto_created=True, detection_method="auto"
+            )
+            return success
+        
+        results = list(self.pool.map(try_lock, range(num_users)))
+        self.assertEqual(sum(results), 1)
+        
+        # The lock on disk belongs to the winner
+        winner = results.index(True)
+        lock_info = self.lock_manager.check_lock(file_path)
+        self.assertEqual(lock_info.user_name, f"user{winner}")
+        self.assertEqual(len(lock_file_names(self.test_dir)), 1)
     
     def test_error_recovery_integration(self):
         """Test system recovery from various error conditions"""
@@ -313,7 +357,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.delete('/api/locks/nonexistent_file.sldprt?user_name=nonexistent_user')
         
         self.assertEqual(response.status_code, 400)  # LockManager returns False for non-existent lock
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('error', data)
         
         # Verify system is still functional
@@ -331,7 +375,7 @@ class TestNovaIntegration(unittest.TestCase):
         response = self.client.get('/api/locks')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         # Check what locks actually exist
         if len(data) != 1:
             print(f"Expected 1 lock, but found {len(data)} locks:")
@@ -345,42 +389,43 @@ class TestNovaIntegration(unittest.TestCase):
         """Test system performance with many locks"""
         # Create many locks
         num_locks = 100
-        for i in range(num_locks):
-            file_path = f"/shared/projects/file_{i:03d}.sldprt"
-            user = self.test_users[i % len(self.test_users)]
-            computer = self.test_computers[i % len(self.test_computers)]
-            
+        file_paths = [f"/shared/projects/file_{i:03d}.sldprt" for i in range(num_locks)]
+        users = islice(cycle(self.test_users), num_locks)
+        computers = islice(cycle(self.test_computers), num_locks)
+        pids = range(1000, 1000 + num_locks)
+        
+        for file_path, user, computer, pid in zip(file_paths, users, computers, pids):
             success, _ = self.lock_manager.create_lock(
-                file_path, user, computer, 1000 + i,
+                file_path, user, computer, pid,
                 auto_created=True, detection_method="auto"
             )
             
             self.assertTrue(success)
         
         # Test dashboard performance with many locks
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         response = self.client.get('/api/locks')
-        end_time = time.time()
+        end_ns = time.perf_counter_ns()
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data), num_locks)
         
         # Performance should be reasonable (under 1 second for 100 locks)
-        response_time = end_time - start_time
+        response_time = (end_ns - start_ns) / 1e9
         self.assertLess(response_time, 1.0, f"Dashboard response too slow: {response_time:.3f}s")
         
         # Test statistics performance
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         response = self.client.get('/api/stats')
-        end_time = time.time()
+        end_ns = time.perf_counter_ns()
         
         self.assertEqual(response.status_code, 200)
-        stats = json.loads(response.data)
+        stats = response.get_json()
         self.assertEqual(stats['total_locks'], num_locks)
         
         # Statistics should also be fast
-        response_time = end_time - start_time
+        response_time = (end_ns - start_ns) / 1e9
         self.assertLess(response_time, 1.0, f"Stats response too slow: {response_time:.3f}s")
 
 if __name__ == '__main__':
@@ -3,31 +3,55 @@
 Unit tests for Nova Lock Manager
 """
 
+import json
+import os
+import time
 import unittest
 import tempfile
 import shutil
 from pathlib import Path
+from unittest.mock import patch
 import sys
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.core.lock_manager import LockManager
 
+def clear_directory(directory):
+    """Remove everything inside directory, leaving it empty"""
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+
+def lock_file_names(directory):
+    """Names of the .lock files directly inside directory"""
+    return [entry.name for entry in os.scandir(directory) if entry.name.endswith(".lock")]
+
 class TestLockManager(unittest.TestCase):
     """Test cases for LockManager class"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one temporary lock directory for the whole class"""
+        cls.test_dir = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up test environment"""
+        shutil.rmtree(cls.test_dir)
+    
     def setUp(self):
         """Set up test environment"""
-        # Create temporary directory for test locks
-        self.test_dir = tempfile.mkdtemp()
+        # Each test starts from an empty lock directory and a fresh manager
+        clear_directory(self.test_dir)
         self.lock_manager = LockManager(self.test_dir)
         self.test_file = "/shared/projects/test_file.sldprt"
     
-    def tearDown(self):
-        """Clean up test environment"""
-        shutil.rmtree(self.test_dir)
-    
     def test_create_lock_success(self):
         """Test successful lock creation with enhanced analytics in NovaLocks directory"""
         success, message = self.lock_manager.create_lock(
@@ -55,9 +79,7 @@ class TestLockManager(unittest.TestCase):
         self.assertIsNotNone(lock_info.lock_file)
         
         # Verify lock file is created in the test directory
-        lock_files = list(Path(self.test_dir).glob("*.lock"))
-        self.assertEqual(len(lock_files), 1)
-        self.assertTrue(lock_files[0].exists())
+        self.assertEqual(len(lock_file_names(self.test_dir)), 1)
     
     def test_create_lock_conflict(self):
         """Test lock creation when file is already locked"""
@@ -117,10 +139,12 @@ class TestLockManager(unittest.TestCase):
         ]
         
         for file_path in cad_files:
-            self.assertTrue(self.lock_manager.is_cad_file(file_path))
+            with self.subTest(file_path=file_path):
+                self.assertTrue(self.lock_manager.is_cad_file(file_path))
         
         for file_path in non_cad_files:
-            self.assertFalse(self.lock_manager.is_cad_file(file_path))
+            with self.subTest(file_path=file_path):
+                self.assertFalse(self.lock_manager.is_cad_file(file_path))
     
     def test_get_all_locks(self):
         """Test getting all active locks with analytics"""
@@ -153,6 +177,72 @@ class TestLockManager(unittest.TestCase):
             self.assertIsNotNone(lock.last_seen)
             self.assertIsNotNone(lock.lock_id)
     
+    def test_iter_locks_skips_corrupted(self):
+        """Test streaming locks removes corrupted lock files like get_all_locks"""
+        self.lock_manager.create_lock("/path/to/file1.sldprt", "user1", "PC1")
+        corrupted = Path(self.test_dir) / "deadbeef_broken.sldprt.lock"
+        corrupted.write_text("{not json")
+        old = time.time() - 3600
+        os.utime(corrupted, (old, old))
+        
+        # Just created, so possibly still being written by another client
+        in_progress = Path(self.test_dir) / "deadbeef_new.sldprt.lock"
+        in_progress.write_text("")
+        
+        locks = self.lock_manager.iter_locks()
+        
+        self.assertNotIsInstance(locks, list)
+        self.assertEqual([lock.file_path for lock in locks], ["/path/to/file1.sldprt"])
+        self.assertFalse(corrupted.exists())
+        self.assertTrue(in_progress.exists())
+    
+    def test_create_lock_over_unreadable_lock_file(self):
+        """Test a just-created unreadable lock file is left alone, an old one is replaced"""
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        lock_file.write_text("")
+        
+        # Another client may still be writing it
+        success, message = self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        self.assertFalse(success)
+        self.assertIn("being locked", message)
+        
+        # Old enough to be corrupted rather than in progress
+        old = time.time() - 3600
+        os.utime(lock_file, (old, old))
+        success, _ = self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        self.assertTrue(success)
+        self.assertEqual(self.lock_manager.check_lock(self.test_file).user_name, "test_user")
+    
+    def test_index_sees_changes_from_other_managers(self):
+        """Test cached lock data is revalidated against locks written by other processes"""
+        other_manager = LockManager(self.test_dir)
+        self.lock_manager.create_lock("/path/to/file1.sldprt", "user1", "PC1")
+        
+        # Populate this manager's index, then change the directory behind its back
+        self.assertEqual(len(self.lock_manager.get_all_locks()), 1)
+        other_manager.remove_lock("/path/to/file1.sldprt", "user1")
+        other_manager.create_lock("/path/to/file2.dwg", "user2", "PC2")
+        
+        locks = self.lock_manager.get_all_locks()
+        self.assertEqual([lock.file_path for lock in locks], ["/path/to/file2.dwg"])
+        self.assertIsNone(self.lock_manager.check_lock("/path/to/file1.sldprt"))
+    
+    def test_index_sees_same_size_rewrite_with_same_mtime(self):
+        """Test a replaced lock file is re-read even if its size and mtime didn't change"""
+        self.lock_manager.create_lock(self.test_file, "user1", "PC1")
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        before = os.stat(lock_file)
+        self.assertEqual(self.lock_manager.check_lock(self.test_file).user_name, "user1")
+        
+        # Another machine replaces the file within the share's mtime resolution
+        replacement = Path(self.test_dir) / "replacement.tmp"
+        replacement.write_bytes(lock_file.read_bytes().replace(b'"user1"', b'"user2"'))
+        os.replace(replacement, lock_file)
+        os.utime(lock_file, ns=(before.st_atime_ns, before.st_mtime_ns))
+        self.assertEqual(os.stat(lock_file).st_size, before.st_size)
+        
+        self.assertEqual(self.lock_manager.check_lock(self.test_file).user_name, "user2")
+    
     def test_lock_analytics(self):
         """Test lock analytics functionality"""
         # Create locks with different characteristics
@@ -183,6 +273,18 @@ class TestLockManager(unittest.TestCase):
         self.assertIsNotNone(analytics['average_lock_age'])
         self.assertIsNotNone(analytics['stale_locks'])
     
+    def test_lock_analytics_include_ages(self):
+        """Per-lock ages are only collected when requested"""
+        self.lock_manager.create_lock("/path/file1.sldprt", "user1", "PC1")
+        self.lock_manager.create_lock("/path/file2.dwg", "user2", "PC2")
+        
+        self.assertEqual(self.lock_manager.get_lock_analytics()['lock_ages'], [])
+        
+        analytics = self.lock_manager.get_lock_analytics(include_ages=True)
+        self.assertEqual(len(analytics['lock_ages']), 2)
+        self.assertAlmostEqual(analytics['average_lock_age'],
+                               sum(analytics['lock_ages']) / 2, places=3)
+    
     def test_update_lock_activity(self):
         """Test updating lock activity timestamp"""
         # Create lock
@@ -192,10 +294,10 @@ class TestLockManager(unittest.TestCase):
         original_lock = self.lock_manager.check_lock(self.test_file)
         original_last_seen = original_lock.last_seen
         
-        # Wait a bit and update activity
-        import time
-        time.sleep(1)
-        success, message = self.lock_manager.update_lock_activity(self.test_file, "test_user")
+        # Update activity a minute later, without waiting for it
+        later = time.time() + 60
+        with patch("backend.core.lock_manager.time.time", return_value=later):
+            success, message = self.lock_manager.update_lock_activity(self.test_file, "test_user")
         
         self.assertTrue(success)
         self.assertEqual(message, "Lock activity updated")
@@ -204,6 +306,131 @@ class TestLockManager(unittest.TestCase):
         updated_lock = self.lock_manager.check_lock(self.test_file)
         self.assertNotEqual(original_last_seen, updated_lock.last_seen)
     
+    def test_update_lock_activity_write_back(self):
+        """Test buffered heartbeats reach the lock file on flush, and only for the same lock"""
+        self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        other_manager = LockManager(self.test_dir)
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        
+        # Backdate the heartbeat on disk, then heartbeat and flush
+        lock_data = json.loads(lock_file.read_text())
+        lock_data['last_seen'] = "2000-01-01 00:00:00"
+        lock_file.write_text(json.dumps(lock_data, indent=2))
+        self.lock_manager.update_lock_activity(self.test_file, "test_user")
+        self.lock_manager.close()
+        self.assertNotEqual(other_manager.check_lock(self.test_file).last_seen, "2000-01-01 00:00:00")
+        
+        # A pending heartbeat must not overwrite a lock re-created by another user
+        other_manager.remove_lock(self.test_file, "test_user")
+        other_manager.create_lock(self.test_file, "other_user", "OTHER-PC")
+        replaced = other_manager.check_lock(self.test_file)
+        self.lock_manager._dirty[lock_file.name] = lock_file
+        self.lock_manager.flush()
+        
+        self.assertEqual(LockManager(self.test_dir).check_lock(self.test_file).lock_id, replaced.lock_id)
+        self.assertEqual(LockManager(self.test_dir).check_lock(self.test_file).user_name, "other_user")
+    
+    def test_failed_create_leaves_no_lock_file(self):
+        """Test a failed lock write leaves neither a lock file nor a temp file"""
+        with patch("os.fsync", side_effect=OSError(28, "No space left on device")):
+            success, message = self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        
+        self.assertFalse(success)
+        self.assertIn("Failed to create lock", message)
+        self.assertEqual(os.listdir(self.test_dir), [])
+        self.assertTrue(self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")[0])
+    
+    def test_create_lock_without_hard_links(self):
+        """Test locks are still created exclusively in a directory without hard links"""
+        with patch("os.link", side_effect=OSError(1, "Operation not permitted")):
+            self.assertTrue(self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")[0])
+            success, message = self.lock_manager.create_lock(self.test_file, "other_user", "OTHER-PC")
+        
+        self.assertFalse(success)
+        self.assertIn("locked by test_user", message)
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        self.assertEqual(os.listdir(self.test_dir), [lock_file.name])
+    
+    def test_failed_rewrite_leaves_no_temp_file(self):
+        """Test a failed heartbeat write-back keeps the old lock file and no temp file"""
+        self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        before = lock_file.read_bytes()
+        
+        self.lock_manager.update_lock_activity(self.test_file, "test_user")
+        with patch("os.write", side_effect=OSError(28, "No space left on device")):
+            self.lock_manager.flush()
+        
+        self.assertEqual(lock_file.read_bytes(), before)
+        self.assertEqual([p.name for p in Path(self.test_dir).iterdir()], [lock_file.name])
+    
+    def test_lock_file_schema_readable_by_older_clients(self):
+        """Test lock files only hold the LockInfo fields older clients know about"""
+        self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        self.lock_manager.update_lock_activity(self.test_file, "test_user")
+        self.lock_manager.close()
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        
+        lock_data = json.loads(lock_file.read_text())
+        self.assertEqual(set(lock_data), {
+            'file_path', 'original_path', 'file', 'user_name', 'computer_name',
+            'lock_time', 'last_seen', 'lock_file', 'lock_id', 'auto_created',
+            'detection_method', 'process_id', 'file_hash'
+        })
+    
+    def test_index_reparses_changed_timestamps(self):
+        """Test staleness follows timestamps rewritten in the lock file"""
+        self.lock_manager.create_lock(self.test_file, "test_user", "TEST-PC")
+        self.assertIsNotNone(self.lock_manager.check_lock(self.test_file))
+        lock_file = self.lock_manager.get_lock_file_path(self.test_file)
+        
+        lock_data = json.loads(lock_file.read_text())
+        lock_data['lock_time'] = lock_data['last_seen'] = "2000-01-01 00:00:00"
+        lock_file.write_text(json.dumps(lock_data, indent=2))
+        
+        # Expired by its new timestamp, so it is removed and can be re-locked
+        self.assertIsNone(self.lock_manager.check_lock(self.test_file))
+        success, _ = self.lock_manager.create_lock(self.test_file, "other_user", "OTHER-PC")
+        self.assertTrue(success)
+    
+    def test_cleanup_skips_recently_modified_lock_files(self):
+        """Test cleanup only parses lock files last written before the cutoff"""
+        self.lock_manager.create_lock("/path/to/old.sldprt", "user1", "PC1")
+        self.lock_manager.create_lock("/path/to/busy.sldprt", "user1", "PC1")
+        
+        # Both locks were created long ago, but only "old" has had no writes since
+        for name in ("old", "busy"):
+            lock_file = self.lock_manager.get_lock_file_path(f"/path/to/{name}.sldprt")
+            lock_data = json.loads(lock_file.read_text())
+            lock_data['lock_time'] = "2000-01-01 00:00:00"
+            lock_file.write_text(json.dumps(lock_data))
+            if name == "old":
+                os.utime(lock_file, (time.time() - 48 * 3600,) * 2)
+        
+        self.assertEqual(self.lock_manager.cleanup_stale_locks(max_age_hours=24), 1)
+        self.assertFalse(self.lock_manager.get_lock_file_path("/path/to/old.sldprt").exists())
+        self.assertTrue(self.lock_manager.get_lock_file_path("/path/to/busy.sldprt").exists())
+    
+    def test_bulk_removal_keeps_locks_recreated_during_sweep(self):
+        """Test a lock re-created by someone else after the scan survives remove_user_locks"""
+        self.lock_manager.create_lock("/path/to/a.sldprt", "user1", "PC1")
+        self.lock_manager.create_lock("/path/to/b.sldprt", "user1", "PC1")
+        recreated = self.lock_manager.get_lock_file_path("/path/to/b.sldprt")
+        unlink_locks = self.lock_manager._unlink_locks
+        
+        def recreate_then_unlink(victims):
+            # Another client takes over b between the scan and the unlinks
+            other_manager = LockManager(self.test_dir)
+            recreated.unlink()
+            other_manager.create_lock("/path/to/b.sldprt", "user2", "PC2")
+            return unlink_locks(victims)
+        
+        with patch.object(self.lock_manager, '_unlink_locks', side_effect=recreate_then_unlink):
+            removed = self.lock_manager.remove_user_locks("user1")
+        
+        self.assertEqual(removed, 1)
+        self.assertEqual(LockManager(self.test_dir).check_lock("/path/to/b.sldprt").user_name, "user2")
+    
     def test_cadlock_style_file_naming(self):
         """Test CADLock-style lock file naming"""
         test_files = [
@@ -211,27 +438,27 @@ class TestLockManager(unittest.TestCase):
             "/path/with/special:chars*.dwg",  # special characters
             "/very/long/path/to/engine_part.sldprt"
         ]
+        unsafe_chars = set('/\\:*?"<>| ')
         
         for file_path in test_files:
-            # Create lock
-            success, _ = self.lock_manager.create_lock(file_path, "test_user", "TEST-PC", auto_created=False, detection_method="manual")
-            self.assertTrue(success)
-            
-            # Check lock file path is safe
-            lock_file_path = self.lock_manager.get_lock_file_path(file_path)
-            lock_filename = lock_file_path.name
-            
-            # Should not contain unsafe characters
-            unsafe_chars = ['/', '\\', ':', '*', '?', '"', '<', '>', '|', ' ']
-            for char in unsafe_chars:
-                if char in lock_filename:
-                    self.fail(f"Unsafe character '{char}' found in lock filename: {lock_filename}")
-            
-            # Should have .lock extension
-            self.assertTrue(lock_filename.endswith('.lock'))
-            
-            # Should contain hash prefix
-            self.assertTrue('_' in lock_filename)
+            with self.subTest(file_path=file_path):
+                # Create lock
+                success, _ = self.lock_manager.create_lock(file_path, "test_user", "TEST-PC", auto_created=False, detection_method="manual")
+                self.assertTrue(success)
+                
+                # Check lock file path is safe
+                lock_file_path = self.lock_manager.get_lock_file_path(file_path)
+                lock_filename = lock_file_path.name
+                
+                # Should not contain unsafe characters
+                found = unsafe_chars.intersection(lock_filename)
+                self.assertFalse(found, f"Unsafe characters {sorted(found)} found in lock filename: {lock_filename}")
+                
+                # Should have .lock extension
+                self.assertTrue(lock_filename.endswith('.lock'))
+                
+                # Should contain hash prefix
+                self.assertTrue('_' in lock_filename)
     
     def test_novalocks_directory_structure(self):
         """Test that Nova creates and uses NovaLocks directory structure"""
@@ -251,9 +478,7 @@ class TestLockManager(unittest.TestCase):
             self.assertTrue(success)
             
             # Verify lock file is in NovaLocks directory
-            lock_files = list(novalocks_dir.glob("*.lock"))
-            self.assertEqual(len(lock_files), 1)
-            self.assertTrue(lock_files[0].exists())
+            self.assertEqual(len(lock_file_names(novalocks_dir)), 1)
             
             # Verify the directory name contains "NovaLocks"
             self.assertIn("NovaLocks", str(novalocks_dir))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Nova PID file handling
+"""
+
+import errno
+import os
+import subprocess
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+# Add parent directory to path
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from backend.core import pidfile
+from backend.core.pidfile import is_process_alive, read_pid, write_pid_file
+
+def _exited_pid() -> int:
+    """PID of a child process that has already exited and been reaped"""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+class TestPidFile(unittest.TestCase):
+    """Test cases for the PID file helpers"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+        self.pid_file = Path(self.test_dir) / "nova_monitor.pid"
+        pidfile._pid_cache.update(key=None, pid=None)
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_write_and_read_pid(self):
+        """Test that a written PID reads back and leaves no temp files"""
+        write_pid_file(self.pid_file, os.getpid())
+        
+        self.assertEqual(read_pid(self.pid_file), os.getpid())
+        self.assertEqual(list(Path(self.test_dir).glob("*.tmp")), [])
+    
+    def test_read_pid_missing_or_invalid(self):
+        """Test that missing and garbage PID files read as None"""
+        self.assertIsNone(read_pid(self.pid_file))
+        
+        self.pid_file.write_text("not a pid")
+        self.assertIsNone(read_pid(self.pid_file))
+    
+    def test_read_pid_cached_until_file_changes(self):
+        """Test that an unchanged PID file is not re-read"""
+        write_pid_file(self.pid_file, 1234)
+        self.assertEqual(read_pid(self.pid_file), 1234)
+        
+        with patch("builtins.open", side_effect=AssertionError("PID file re-read")):
+            self.assertEqual(read_pid(self.pid_file), 1234)
+        
+        # Same size, new inode: the atomic replace must invalidate the cache
+        write_pid_file(self.pid_file, 4321)
+        self.assertEqual(read_pid(self.pid_file), 4321)
+    
+    def test_write_refuses_live_pid(self):
+        """Test that a PID file owned by another running process is kept"""
+        # Our parent process is alive and isn't us
+        self.pid_file.write_text(str(os.getppid()))
+        
+        with self.assertRaises(FileExistsError):
+            write_pid_file(self.pid_file, os.getpid())
+        self.assertEqual(read_pid(self.pid_file), os.getppid())
+    
+    def test_write_replaces_dead_pid(self):
+        """Test that a PID file left by an exited process is overwritten"""
+        self.pid_file.write_text(str(_exited_pid()))
+        
+        write_pid_file(self.pid_file, os.getpid())
+        self.assertEqual(read_pid(self.pid_file), os.getpid())
+    
+    @unittest.skipIf(os.name == 'nt', "kill(pid, 0) semantics are POSIX only")
+    def test_is_process_alive_errno_mapping(self):
+        """Test that EPERM counts as alive and ESRCH as dead"""
+        self.assertTrue(is_process_alive(os.getpid()))
+        
+        with patch("os.kill", side_effect=PermissionError(errno.EPERM, "Operation not permitted")):
+            self.assertTrue(is_process_alive(1))
+        with patch("os.kill", side_effect=ProcessLookupError(errno.ESRCH, "No such process")):
+            self.assertFalse(is_process_alive(1))
+        
+        self.assertFalse(is_process_alive(_exited_pid()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,39 +9,79 @@ import tempfile
 import shutil
 import os
 import sys
-import signal
 import time
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock, call
+from unittest.mock import patch
 
 # Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
 from backend.cli.main import NovaCLI
 from backend.monitor.file_monitor import FileMonitor
-from backend.web.dashboard import start_dashboard, init_dashboard
 
-class TestServiceLifecycle(unittest.TestCase):
-    """Test cases for service lifecycle management"""
+def clear_directory(directory):
+    """Remove everything inside directory, leaving it empty"""
+    for entry in os.scandir(directory):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+
+# Lock directory shared by every test class, see setUpModule
+_temp_dir = None
+_env_patcher = None
+
+def setUpModule():
+    """Create one lock directory for the whole module and point NOVA_LOCKS_DIR at it"""
+    global _temp_dir, _env_patcher
+    _temp_dir = tempfile.TemporaryDirectory()
+    
+    # Mock environment
+    _env_patcher = patch.dict(os.environ, {'NOVA_LOCKS_DIR': _temp_dir.name})
+    _env_patcher.start()
+
+def tearDownModule():
+    """Clean up test environment"""
+    _env_patcher.stop()
+    _temp_dir.cleanup()
+
+class ServiceTestCase(unittest.TestCase):
+    """Shared lock directory, CLI and lock manager for the service tests"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Create the CLI and its lock manager for the module's lock directory"""
+        cls.test_dir = _temp_dir.name
+        cls.cli = NovaCLI()
+        cls.cli.setup_lock_manager()
     
     def setUp(self):
         """Set up test environment"""
-        self.test_dir = tempfile.mkdtemp()
-        self.cli = NovaCLI()
-        
-        # Mock environment
-        self.env_patcher = patch.dict(os.environ, {'NOVA_LOCKS_DIR': str(self.test_dir)})
-        self.env_patcher.start()
+        # Start each test from an empty lock directory and no file monitor
+        clear_directory(self.test_dir)
+        self.cli.lock_manager.reload()
+        self.cli.file_monitor = None
+        self.addCleanup(self.stop_file_monitor)
     
-    def tearDown(self):
-        """Clean up test environment"""
-        self.env_patcher.stop()
-        shutil.rmtree(self.test_dir)
+    def stop_file_monitor(self):
+        """Stop the file monitor a test left running, even if it failed"""
+        monitor = self.cli.file_monitor
+        if monitor is not None and monitor.is_monitoring():
+            monitor.stop_monitoring()
+
+class TestServiceLifecycle(ServiceTestCase):
+    """Test cases for service lifecycle management"""
     
     def test_service_initialization(self):
         """Test that services initialize correctly"""
+        lock_manager = self.cli.lock_manager
+        
+        # Setting up again (already done in setUpClass) reuses the same manager
         self.cli.setup_lock_manager()
+        self.assertIs(self.cli.lock_manager, lock_manager)
         
         # Verify core components are initialized
         self.assertIsNotNone(self.cli.lock_manager)
@@ -54,7 +94,6 @@ class TestServiceLifecycle(unittest.TestCase):
     
     def test_file_monitor_startup(self):
         """Test file monitor service startup"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager, check_interval=0.1)
         
         # Start monitoring
@@ -64,14 +103,9 @@ class TestServiceLifecycle(unittest.TestCase):
         # Stop monitoring
         self.cli.file_monitor.stop_monitoring()
         self.assertFalse(self.cli.file_monitor.is_monitoring())
-        
-        # Clean up any remaining threads
-        if hasattr(self.cli.file_monitor, '_monitor_thread') and self.cli.file_monitor._monitor_thread:
-            self.cli.file_monitor._monitor_thread.join(timeout=1.0)
     
     def test_file_monitor_restart(self):
         """Test file monitor service restart capability"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager, check_interval=0.1)
         
         # Start, stop, and restart
@@ -86,35 +120,29 @@ class TestServiceLifecycle(unittest.TestCase):
         self.assertTrue(self.cli.file_monitor.is_monitoring())
         
         self.cli.file_monitor.stop_monitoring()
-        
-        # Clean up any remaining threads
-        if hasattr(self.cli.file_monitor, '_monitor_thread') and self.cli.file_monitor._monitor_thread:
-            self.cli.file_monitor._monitor_thread.join(timeout=1.0)
     
-    def test_dashboard_service_startup(self):
+    @patch('backend.web.dashboard.init_dashboard')
+    @patch('backend.web.dashboard.start_dashboard')
+    def test_dashboard_service_startup(self, mock_start, mock_init):
         """Test dashboard service startup"""
-        with patch('backend.web.dashboard.init_dashboard') as mock_init:
-            with patch('backend.web.dashboard.start_dashboard') as mock_start:
-                # Test dashboard startup
-                self.cli.start_dashboard('127.0.0.1', 5001)
-                
-                mock_init.assert_called_once()
-                mock_start.assert_called_once_with('127.0.0.1', 5001)
+        # Test dashboard startup
+        self.cli.start_dashboard('127.0.0.1', 5001)
+        
+        mock_init.assert_called_once()
+        mock_start.assert_called_once_with('127.0.0.1', 5001)
     
-    def test_dashboard_service_configuration(self):
+    @patch('backend.web.dashboard.init_dashboard')
+    @patch('backend.web.dashboard.start_dashboard')
+    def test_dashboard_service_configuration(self, mock_start, mock_init):
         """Test dashboard service configuration options"""
-        with patch('backend.web.dashboard.init_dashboard') as mock_init:
-            with patch('backend.web.dashboard.start_dashboard') as mock_start:
-                # Test different host/port configurations
-                self.cli.start_dashboard('0.0.0.0', 8080)
-                
-                mock_init.assert_called_once()
-                mock_start.assert_called_once_with('0.0.0.0', 8080)
+        # Test different host/port configurations
+        self.cli.start_dashboard('0.0.0.0', 8080)
+        
+        mock_init.assert_called_once()
+        mock_start.assert_called_once_with('0.0.0.0', 8080)
     
     def test_service_dependency_management(self):
         """Test that services handle dependencies correctly"""
-        self.cli.setup_lock_manager()
-        
         # Verify lock manager is available before starting monitor
         self.assertIsNotNone(self.cli.lock_manager)
         
@@ -125,50 +153,37 @@ class TestServiceLifecycle(unittest.TestCase):
         # Verify the dependency chain
         self.assertEqual(self.cli.file_monitor.lock_manager, self.cli.lock_manager)
 
-class TestServiceErrorHandling(unittest.TestCase):
+class TestServiceErrorHandling(ServiceTestCase):
     """Test cases for service error handling and recovery"""
     
-    def setUp(self):
-        """Set up test environment"""
-        self.test_dir = tempfile.mkdtemp()
-        self.cli = NovaCLI()
-        
-        # Mock environment
-        self.env_patcher = patch.dict(os.environ, {'NOVA_LOCKS_DIR': str(self.test_dir)})
-        self.env_patcher.start()
-    
-    def tearDown(self):
-        """Clean up test environment"""
-        self.env_patcher.stop()
-        shutil.rmtree(self.test_dir)
-    
     def test_lock_manager_initialization_failure(self):
         """Test handling of lock manager initialization failure"""
-        # Mock a failure in lock manager creation
-        with patch('backend.core.lock_manager.LockManager', side_effect=Exception("Lock manager failed")):
-            with self.assertRaises(Exception):
-                self.cli.setup_lock_manager()
+        # The class CLI is already set up, so use a new one on a directory
+        # that has no lock manager yet
+        fresh_dir = os.path.join(self.test_dir, "fresh")
+        with patch.dict(os.environ, {'NOVA_LOCKS_DIR': fresh_dir}):
+            # Mock a failure in lock manager creation
+            with patch('backend.core.lock_manager.LockManager', side_effect=Exception("Lock manager failed")):
+                with self.assertRaises(Exception):
+                    NovaCLI().setup_lock_manager()
     
     def test_file_monitor_startup_failure(self):
         """Test handling of file monitor startup failure"""
-        self.cli.setup_lock_manager()
+        self.cli.file_monitor = FileMonitor(self.cli.lock_manager)
         
         # Mock a failure in file monitor startup
-        with patch.object(FileMonitor, 'start_monitoring', side_effect=Exception("Monitor failed")):
-            self.cli.file_monitor = FileMonitor(self.cli.lock_manager)
-            
+        with patch.object(self.cli.file_monitor, 'start_monitoring', side_effect=Exception("Monitor failed")):
             with self.assertRaises(Exception):
                 self.cli.file_monitor.start_monitoring()
     
-    def test_dashboard_startup_failure(self):
+    @patch('backend.web.dashboard.init_dashboard', side_effect=Exception("Dashboard failed"))
+    def test_dashboard_startup_failure(self, mock_init):
         """Test handling of dashboard startup failure"""
-        with patch('backend.web.dashboard.init_dashboard', side_effect=Exception("Dashboard failed")):
-            with self.assertRaises(Exception):
-                self.cli.start_dashboard('127.0.0.1', 5001)
+        with self.assertRaises(Exception):
+            self.cli.start_dashboard('127.0.0.1', 5001)
     
     def test_service_cleanup_on_failure(self):
         """Test that services clean up properly on failure"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager)
         
         # Start monitoring
@@ -186,56 +201,30 @@ class TestServiceErrorHandling(unittest.TestCase):
         # Verify cleanup
         self.cli.file_monitor.stop_monitoring()
         self.assertFalse(self.cli.file_monitor.is_monitoring())
-        
-        # Clean up any remaining threads
-        if hasattr(self.cli.file_monitor, '_monitor_thread') and self.cli.file_monitor._monitor_thread:
-            self.cli.file_monitor._monitor_thread.join(timeout=1.0)
     
     def test_graceful_shutdown_on_signal(self):
         """Test graceful shutdown when receiving signals"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager)
         
         # Start monitoring
         self.cli.file_monitor.start_monitoring()
         self.assertTrue(self.cli.file_monitor.is_monitoring())
         
-        # Simulate receiving a signal
-        with patch('signal.signal') as mock_signal:
-            # The monitor should handle signals gracefully
-            self.cli.file_monitor.stop_monitoring()
-            self.assertFalse(self.cli.file_monitor.is_monitoring())
-            
-            # Clean up any remaining threads
-            if hasattr(self.cli.file_monitor, '_monitor_thread') and self.cli.file_monitor._monitor_thread:
-                self.cli.file_monitor._monitor_thread.join(timeout=1.0)
+        # The monitor should shut down gracefully, as on a stop signal
+        self.cli.file_monitor.stop_monitoring()
+        self.assertFalse(self.cli.file_monitor.is_monitoring())
 
-class TestServicePerformance(unittest.TestCase):
+class TestServicePerformance(ServiceTestCase):
     """Test cases for service performance and resource management"""
     
-    def setUp(self):
-        """Set up test environment"""
-        self.test_dir = tempfile.mkdtemp()
-        self.cli = NovaCLI()
-        
-        # Mock environment
-        self.env_patcher = patch.dict(os.environ, {'NOVA_LOCKS_DIR': str(self.test_dir)})
-        self.env_patcher.start()
-    
-    def tearDown(self):
-        """Clean up test environment"""
-        self.env_patcher.stop()
-        shutil.rmtree(self.test_dir)
-    
     def test_file_monitor_performance(self):
         """Test file monitor performance characteristics"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager, check_interval=0.1)
         
         # Measure startup time
-        start_time = time.time()
+        start_time = time.perf_counter()
         self.cli.file_monitor.start_monitoring()
-        startup_time = time.time() - start_time
+        startup_time = time.perf_counter() - start_time
         
         # Startup should be fast (< 1 second)
         self.assertLess(startup_time, 1.0, f"File monitor startup too slow: {startup_time:.3f}s")
@@ -245,14 +234,12 @@ class TestServicePerformance(unittest.TestCase):
     
     def test_lock_manager_performance(self):
         """Test lock manager performance characteristics"""
-        self.cli.setup_lock_manager()
-        
         # Measure lock creation time
-        start_time = time.time()
+        start_time = time.perf_counter()
         success, message = self.cli.lock_manager.create_lock(
             "test_file.sldprt", "test_user", "TEST-PC", 1234
         )
-        lock_time = time.time() - start_time
+        lock_time = time.perf_counter() - start_time
         
         # Lock creation should be fast (< 0.1 seconds)
         self.assertLess(lock_time, 0.1, f"Lock creation too slow: {lock_time:.3f}s")
@@ -261,37 +248,36 @@ class TestServicePerformance(unittest.TestCase):
         # Clean up
         self.cli.lock_manager.remove_lock("test_file.sldprt", "test_user")
     
-    def test_dashboard_initialization_performance(self):
+    @patch('backend.web.dashboard.init_dashboard')
+    @patch('backend.web.dashboard.start_dashboard')
+    def test_dashboard_initialization_performance(self, mock_start, mock_init):
         """Test dashboard initialization performance"""
-        start_time = time.time()
+        start_time = time.perf_counter()
+        self.cli.start_dashboard('127.0.0.1', 5001)
+        init_time = time.perf_counter() - start_time
         
-        with patch('backend.web.dashboard.init_dashboard') as mock_init:
-            with patch('backend.web.dashboard.start_dashboard') as mock_start:
-                self.cli.start_dashboard('127.0.0.1', 5001)
-                
-                init_time = time.time() - start_time
-                
-                # Dashboard initialization should be fast (< 0.5 seconds)
-                self.assertLess(init_time, 0.5, f"Dashboard init too slow: {init_time:.3f}s")
+        # Dashboard initialization should be fast (< 0.5 seconds)
+        self.assertLess(init_time, 0.5, f"Dashboard init too slow: {init_time:.3f}s")
     
     def test_service_memory_usage(self):
         """Test that services don't leak memory"""
-        self.cli.setup_lock_manager()
-        
         # Create multiple monitors to test for memory leaks
         monitors = []
         for i in range(5):
             monitor = FileMonitor(self.cli.lock_manager, check_interval=0.1)
             monitors.append(monitor)
         
-        # Start and stop all monitors
-        for monitor in monitors:
+        def start_and_stop(monitor):
             monitor.start_monitoring()
             monitor.stop_monitoring()
-            
-            # Clean up any remaining threads
-            if hasattr(monitor, '_monitor_thread') and monitor._monitor_thread:
-                monitor._monitor_thread.join(timeout=1.0)
+        
+        # Start and stop all monitors at the same time
+        with ThreadPoolExecutor(max_workers=len(monitors)) as pool:
+            list(pool.map(start_and_stop, monitors))
+        
+        for monitor in monitors:
+            self.assertFalse(monitor.is_monitoring())
+            self.assertFalse(monitor.monitor_thread.is_alive())
         
         # Clean up
         monitors.clear()
@@ -299,26 +285,11 @@ class TestServicePerformance(unittest.TestCase):
         # The system should still be functional
         self.assertIsNotNone(self.cli.lock_manager)
 
-class TestServiceIntegration(unittest.TestCase):
+class TestServiceIntegration(ServiceTestCase):
     """Test cases for service integration and coordination"""
     
-    def setUp(self):
-        """Set up test environment"""
-        self.test_dir = tempfile.mkdtemp()
-        self.cli = NovaCLI()
-        
-        # Mock environment
-        self.env_patcher = patch.dict(os.environ, {'NOVA_LOCKS_DIR': str(self.test_dir)})
-        self.env_patcher.start()
-    
-    def tearDown(self):
-        """Clean up test environment"""
-        self.env_patcher.stop()
-        shutil.rmtree(self.test_dir)
-    
     def test_lock_manager_and_monitor_coordination(self):
         """Test coordination between lock manager and file monitor"""
-        self.cli.setup_lock_manager()
         self.cli.file_monitor = FileMonitor(self.cli.lock_manager)
         
         # Start monitoring
@@ -337,39 +308,32 @@ class TestServiceIntegration(unittest.TestCase):
         # Stop monitoring
         self.cli.file_monitor.stop_monitoring()
         
-        # Clean up any remaining threads
-        if hasattr(self.cli.file_monitor, '_monitor_thread') and self.cli.file_monitor._monitor_thread:
-            self.cli.file_monitor._monitor_thread.join(timeout=1.0)
-        
         # Clean up
         self.cli.lock_manager.remove_lock("test_file.sldprt", "test_user")
     
     def test_dashboard_and_lock_manager_coordination(self):
         """Test coordination between dashboard and lock manager"""
-        self.cli.setup_lock_manager()
-        
         # Create some locks
-        self.cli.lock_manager.create_lock(
-            "file1.sldprt", "user1", "PC1", 1111
-        )
-        self.cli.lock_manager.create_lock(
-            "file2.sldasm", "user2", "PC2", 2222
-        )
-        
-        # Initialize dashboard with the same lock manager
+        locks_to_create = [
+            ("file1.sldprt", "user1", "PC1", 1111),
+            ("file2.sldasm", "user2", "PC2", 2222),
+        ]
+        for file_path, user, computer, pid in locks_to_create:
+            success, _ = self.cli.lock_manager.create_lock(file_path, user, computer, pid)
+            self.assertTrue(success)
+            self.addCleanup(self.cli.lock_manager.remove_lock, file_path, user)
+        
+        # Initialize dashboard with the same lock manager (without serving it)
         with patch('backend.web.dashboard.init_dashboard') as mock_init:
-            self.cli.start_dashboard('127.0.0.1', 5001)
+            with patch('backend.web.dashboard.start_dashboard'):
+                self.cli.start_dashboard('127.0.0.1', 5001)
             
             # Dashboard should be initialized with the lock directory
             mock_init.assert_called_once()
             
             # The dashboard should have access to the same locks
             locks = self.cli.lock_manager.get_all_locks()
-            self.assertEqual(len(locks), 2)
-        
-        # Clean up
-        self.cli.lock_manager.remove_lock("file1.sldprt", "user1")
-        self.cli.lock_manager.remove_lock("file2.sldasm", "user2")
+            self.assertEqual(len(locks), len(locks_to_create))
     
     def test_service_startup_order(self):
         """Test that services start up in the correct order"""